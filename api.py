@@ -0,0 +1,478 @@
+import os
+import asyncio
+import tempfile
+import threading
+import pandas as pd
+import numpy as np
+from contextlib import asynccontextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+from utils.file_handler import extract_data
+from utils.data_preprocessing import DataPreprocessor
+from utils.anomaly_detection import AnomalyDetector, detect_anomalies, parse_temporal_window
+from utils.incremental import IncrementalValidator
+
+UPLOAD_FOLDER = "uploads"
+STATE_FOLDER = "validation_state"
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+class QueueFullError(Exception):
+    """Raised when the worker pool cannot accept more validation jobs."""
+
+
+class ValidationWorkerPool:
+    """
+    Bounded pool for validation jobs.
+
+    At most ``max_workers`` jobs run and ``max_queue`` more may wait; further
+    submissions are rejected with QueueFullError so that callers can back off
+    instead of piling up work in memory. Uploads reserve their slot before the
+    body is read, so a full pool rejects a request before it is written to disk.
+    """
+
+    EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, executor: str = 'thread'):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor!r} (expected one of {', '.join(self.EXECUTORS)})")
+        self.executor = self.EXECUTORS[executor](max_workers=max_workers)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._in_flight: set = set()
+        self._reserved = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def reserve(self, count: int = 1):
+        """Hold ``count`` slots for jobs that will be submitted with submit_reserved()."""
+        with self._lock:
+            if len(self._in_flight) + self._reserved + count > self.capacity:
+                self.rejected += count
+                raise QueueFullError("Validation queue is full, retry later")
+            self._reserved += count
+
+    def release(self, count: int = 1):
+        """Give back reserved slots that will not be used."""
+        with self._lock:
+            self._reserved -= count
+
+    def submit(self, fn, *args) -> Future:
+        self.reserve()
+        return self.submit_reserved(fn, *args)
+
+    def submit_reserved(self, fn, *args) -> Future:
+        """Turn a reserved slot into a running or queued job."""
+        with self._lock:
+            try:
+                future = self.executor.submit(fn, *args)
+            except BaseException:
+                self._reserved -= 1
+                raise
+            self._reserved -= 1
+            self._in_flight.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        with self._lock:
+            self._in_flight.discard(future)
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._in_flight)
+            running = sum(1 for future in self._in_flight if future.running())
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': running,
+                'queue_depth': in_flight - running,
+                'reserved': self._reserved,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def to_serializable(obj: Any) -> Any:
+    """Convert validation reports (numpy, pandas and datetime values) to JSON-compatible data."""
+    if isinstance(obj, dict):
+        return {str(key): to_serializable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set)):
+        return [to_serializable(value) for value in obj]
+    if isinstance(obj, pd.DataFrame):
+        return [to_serializable(record) for record in obj.to_dict(orient='records')]
+    if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return to_serializable(obj.tolist())
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    return obj
+
+
+def run_pipeline(
+    filepath: str,
+    contamination: float = 0.1,
+    dataset_key: Optional[str] = None,
+    detector_options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Run extract_data -> DataPreprocessor.process_data -> detect_anomalies on one file.
+
+    With a ``dataset_key`` the file is treated as the current state of an
+    append-only feed and validated with IncrementalValidator, so only rows
+    added since the previous upload under that key are checked.
+    """
+    data = extract_data(filepath)
+    if not isinstance(data, pd.DataFrame):
+        raise ValueError("The file could not be read as a table")
+
+    if dataset_key is not None:
+        # IncrementalValidator locks the key's state file, which also holds across worker processes
+        validator = IncrementalValidator(
+            state_dir=STATE_FOLDER,
+            detector=AnomalyDetector(contamination=contamination, **(detector_options or {}))
+        )
+        validation_report, anomaly_report = validator.validate(dataset_key, data)
+        return to_serializable({
+            'shape': list(data.shape),
+            'columns': data.columns.tolist(),
+            'validation_report': validation_report,
+            'anomaly_report': anomaly_report,
+        })
+
+    processed_data, validation_report = DataPreprocessor().process_data(data)
+    anomaly_report = detect_anomalies(processed_data, contamination=contamination,
+                                      detector_options=detector_options)
+    return to_serializable({
+        'shape': list(processed_data.shape),
+        'columns': processed_data.columns.tolist(),
+        'validation_report': validation_report,
+        'anomaly_report': anomaly_report,
+    })
+
+
+def _check_extension(filename: str) -> str:
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: {filename}")
+    return extension
+
+
+def _detector_options(
+    temporal_windows: Optional[List[str]],
+    temporal_threshold: Optional[float],
+    temporal_robust: Optional[bool]
+) -> Dict[str, Any]:
+    """Collect the AnomalyDetector settings given as query parameters."""
+    options = {}
+    if temporal_windows:
+        try:
+            options['temporal_windows'] = [parse_temporal_window(window) for window in temporal_windows]
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    if temporal_threshold is not None:
+        options['temporal_threshold'] = temporal_threshold
+    if temporal_robust is not None:
+        options['temporal_robust'] = temporal_robust
+    return options
+
+
+def _temp_path(extension: str) -> str:
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=extension, dir=UPLOAD_FOLDER)
+    os.close(fd)
+    return path
+
+
+class BatchUpload:
+    """
+    Stream the files of a multipart batch to disk, one part at a time.
+
+    Every file takes a worker slot when its headers arrive, starting with the
+    ``spare_slots`` the caller already holds. Files that get no slot, have an
+    unsupported type or exceed ``max_file_bytes`` are not stored; their error
+    is kept in the entry. More files than the pool can ever hold abort the
+    batch with 413.
+    """
+
+    def __init__(self, pool: ValidationWorkerPool, boundary: bytes, max_file_bytes: int, spare_slots: int = 0):
+        self.pool = pool
+        self.max_file_bytes = max_file_bytes
+        self.spare_slots = spare_slots
+        self.files: List[Dict[str, Any]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b''
+        self._value = b''
+        self._entry: Optional[Dict[str, Any]] = None
+        self._file = None
+        self._parser = MultipartParser(boundary, callbacks={
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+        })
+
+    def write(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finalize(self):
+        self._parser.finalize()
+        self._close()
+        self._release_spare()
+
+    def abort(self):
+        """Delete stored files and give back every slot held for this batch."""
+        self._close()
+        for entry in self.files:
+            if 'path' in entry:
+                os.remove(entry.pop('path'))
+                self.pool.release()
+        self._release_spare()
+
+    def _release_spare(self):
+        if self.spare_slots:
+            self.pool.release(self.spare_slots)
+            self.spare_slots = 0
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._entry = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b''
+
+    def _on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b'content-disposition', b''))
+        if params.get(b'name') != b'files' or b'filename' not in params:
+            return
+        if len(self.files) >= self.pool.capacity:
+            raise HTTPException(status_code=413,
+                                detail=f"A batch may contain at most {self.pool.capacity} files")
+        entry = {'filename': params[b'filename'].decode('utf-8', errors='replace')}
+        self.files.append(entry)
+        self._entry = entry
+        try:
+            extension = _check_extension(entry['filename'])
+            if self.spare_slots:
+                self.spare_slots -= 1
+            else:
+                self.pool.reserve()
+        except HTTPException as e:
+            entry['error'] = e
+            return
+        except QueueFullError as e:
+            entry['error'] = HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '1'})
+            return
+        entry['path'] = _temp_path(extension)
+        entry['size'] = 0
+        self._file = open(entry['path'], "wb")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._file is None:
+            return
+        entry = self._entry
+        entry['size'] += end - start
+        if entry['size'] > self.max_file_bytes:
+            # Skip the rest of this file and free its slot
+            self._close()
+            os.remove(entry.pop('path'))
+            self.pool.release()
+            entry['error'] = HTTPException(status_code=413, detail="File too large")
+            return
+        self._file.write(data[start:end])
+
+    def _on_part_end(self):
+        self._close()
+
+
+def create_app(
+    max_workers: int = 4,
+    max_queue: int = 16,
+    max_upload_bytes: int = 500 * 1024 * 1024,
+    executor: str = 'thread',
+    max_batch_bytes: int = 2 * 1024 * 1024 * 1024
+) -> FastAPI:
+    """
+    Build the validation HTTP service.
+
+    Endpoints:
+        POST /validate?filename=data.csv   raw file as the request body; add
+                                           &dataset_key=<feed> to only validate
+                                           rows appended since the last upload
+        POST /validate/batch               multipart form with several 'files'
+        GET  /metrics                      worker pool and queue statistics
+        GET  /health                       liveness check
+
+    ``max_upload_bytes`` limits each file and ``max_batch_bytes`` a whole batch.
+    Both validation endpoints accept spike detector settings as query
+    parameters: temporal_windows (repeatable, e.g. 24 or 7D),
+    temporal_threshold and temporal_robust.
+    """
+    pool = ValidationWorkerPool(max_workers, max_queue, executor)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        pool.shutdown()
+
+    app = FastAPI(title="Climate Data Validator API", lifespan=lifespan)
+    app.state.pool = pool
+
+    def reserve_slots(count: int = 1):
+        try:
+            pool.reserve(count)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '1'})
+
+    async def validate_saved_file(path: str, contamination: float, dataset_key: Optional[str] = None,
+                                  detector_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run the pipeline on a saved upload in a slot reserved by the caller."""
+        try:
+            future = pool.submit_reserved(run_pipeline, path, contamination, dataset_key, detector_options)
+        except BaseException:
+            os.remove(path)
+            raise
+        try:
+            return await asyncio.wrap_future(future)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        finally:
+            os.remove(path)
+
+    @app.get("/health")
+    def health() -> Dict[str, str]:
+        return {'status': 'ok'}
+
+    @app.get("/metrics")
+    def metrics() -> Dict[str, int]:
+        return pool.metrics()
+
+    @app.post("/validate")
+    async def validate(
+        request: Request,
+        filename: str = Query(..., description="Original file name; its extension selects the reader"),
+        contamination: float = Query(0.1, gt=0, le=0.5),
+        dataset_key: Optional[str] = Query(None, min_length=1, description="Name of an append-only feed"),
+        temporal_windows: Optional[List[str]] = Query(None),
+        temporal_threshold: Optional[float] = Query(None, gt=0),
+        temporal_robust: Optional[bool] = Query(None)
+    ) -> Dict[str, Any]:
+        extension = _check_extension(filename)
+        options = _detector_options(temporal_windows, temporal_threshold, temporal_robust)
+
+        # Hold a worker slot before reading the body, so a full pool costs no disk I/O
+        reserve_slots()
+        path = None
+        size = 0
+        try:
+            # Stream the body to disk instead of holding the whole file in memory
+            path = _temp_path(extension)
+            with open(path, "wb") as f:
+                async for chunk in request.stream():
+                    size += len(chunk)
+                    if size > max_upload_bytes:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    f.write(chunk)
+        except BaseException:
+            pool.release()
+            if path is not None:
+                os.remove(path)
+            raise
+
+        result = await validate_saved_file(path, contamination, dataset_key, options)
+        return {'filename': filename, **result}
+
+    @app.post("/validate/batch")
+    async def validate_batch(
+        request: Request,
+        contamination: float = Query(0.1, gt=0, le=0.5),
+        temporal_windows: Optional[List[str]] = Query(None),
+        temporal_threshold: Optional[float] = Query(None, gt=0),
+        temporal_robust: Optional[bool] = Query(None)
+    ) -> Dict[str, Any]:
+        options = _detector_options(temporal_windows, temporal_threshold, temporal_robust)
+        content_type, params = parse_options_header(request.headers.get('content-type', ''))
+        if content_type != b'multipart/form-data' or b'boundary' not in params:
+            raise HTTPException(status_code=415, detail="Expected a multipart/form-data body")
+
+        # Hold one worker slot before reading the body; later files reserve theirs as they arrive
+        reserve_slots()
+        batch = BatchUpload(pool, params[b'boundary'], max_upload_bytes, spare_slots=1)
+        size = 0
+        try:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_batch_bytes:
+                    raise HTTPException(status_code=413, detail="Batch too large")
+                batch.write(chunk)
+            batch.finalize()
+        except BaseException:
+            batch.abort()
+            raise
+        if not batch.files:
+            raise HTTPException(status_code=422, detail="The batch contains no 'files' parts")
+
+        async def validate_upload(entry: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                if 'error' in entry:
+                    raise entry['error']
+                result = await validate_saved_file(entry['path'], contamination, detector_options=options)
+                return {'filename': entry['filename'], 'status': 'ok', **result}
+            except HTTPException as e:
+                return {'filename': entry['filename'], 'status': 'error',
+                        'status_code': e.status_code, 'detail': e.detail}
+            except Exception as e:
+                return {'filename': entry['filename'], 'status': 'error',
+                        'status_code': 500, 'detail': str(e)}
+
+        results = await asyncio.gather(*(validate_upload(entry) for entry in batch.files))
+        return {'results': results}
+
+    return app
+
+
+app = create_app(
+    max_workers=int(os.environ.get('VALIDATOR_WORKERS', 4)),
+    max_queue=int(os.environ.get('VALIDATOR_QUEUE_SIZE', 16)),
+    executor=os.environ.get('VALIDATOR_EXECUTOR', 'thread')
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get('PORT', 8000)))
@@ -5,10 +5,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from utils.file_handler import save_file, extract_data
-from utils.anomaly_detection import detect_anomalies
+from utils.anomaly_detection import detect_anomalies, parse_temporal_window
 from utils.data_preprocessing import DataPreprocessor
 from utils.chat_assistant import ChatAssistant
 from utils.climate_data import ClimateDataRetriever
+from utils.sketches import ColumnProfile, build_profiles
+from utils.rendering import ChartCache, dataset_hash, render_chart
+from utils.missing_data import summarize_missing
 
 # Set page configuration
 st.set_page_config(
@@ -37,11 +40,23 @@ def plot_time_series(data, column, anomaly_indices=None):
     plt.legend()
     return fig
 
-def plot_distribution(data, column):
-    """Plot distribution of values with kernel density estimation."""
+def plot_distribution(data, column, profile=None):
+    """Plot distribution of values from a streaming histogram/quantile sketch."""
+    if profile is None:
+        profile = ColumnProfile().update(data[column])
     fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(data=data, x=column, kde=True, ax=ax)
+    hist = profile.histogram
+    occupied = np.flatnonzero(hist.counts)
+    if occupied.size:
+        first, last = occupied[0], occupied[-1] + 1
+        ax.stairs(hist.counts[first:last], hist.edges[first:last + 1], fill=True, alpha=0.6)
+        q1, median, q3 = profile.quantile(np.array([0.25, 0.5, 0.75]))
+        ax.axvline(median, color='black', linestyle='-', label=f'Median ({median:.2f})')
+        ax.axvspan(q1, q3, color='orange', alpha=0.2, label='Interquartile range')
+        ax.legend()
     ax.set_title(f'Distribution of {column}')
+    ax.set_xlabel(column)
+    ax.set_ylabel('Count')
     return fig
 
 def plot_correlation_heatmap(data):
@@ -54,11 +69,73 @@ def plot_correlation_heatmap(data):
         return fig
     return None
 
-def plot_missing_values(data):
-    """Plot missing values heatmap."""
+def plot_timestamp_series(data, column, anomaly_positions=None):
+    """Plot a column against the 'timestamp' column with highlighted anomalies."""
+    ts_data = data.copy()
+    ts_data['timestamp'] = pd.to_datetime(ts_data['timestamp'])
+    ts_data.set_index('timestamp', inplace=True)
+
+    anomaly_indices = []
+    if anomaly_positions:
+        # Convert numeric indices to timestamps
+        anomaly_indices = ts_data.index[anomaly_positions].tolist()
+    return plot_time_series(ts_data, column, anomaly_indices)
+
+def plot_statistical_anomalies(data, column, indices):
+    """Plot a boxplot of a column with its statistical anomalies marked."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.boxplot(data=data, y=column, ax=ax)
+    sns.stripplot(data=data.iloc[indices], y=column,
+                color='red', size=10, ax=ax)
+    plt.title(f'Statistical Anomalies in {column}')
+    return fig
+
+def plot_isolation_forest_anomalies(data, indices):
+    """Plot Isolation Forest anomalies on the first two numeric columns."""
+    numeric_cols = data.select_dtypes(include=['float64', 'int64']).columns
+    if len(numeric_cols) < 2:
+        return None
+    fig, ax = plt.subplots(figsize=(10, 6))
+    plt.scatter(data[numeric_cols[0]], data[numeric_cols[1]], 
+              alpha=0.5, label='Normal')
+    anomaly_data = data.iloc[indices]
+    plt.scatter(anomaly_data[numeric_cols[0]], anomaly_data[numeric_cols[1]], 
+              color='red', label='Anomaly')
+    plt.xlabel(numeric_cols[0])
+    plt.ylabel(numeric_cols[1])
+    plt.title('Isolation Forest Anomalies')
+    plt.legend()
+    return fig
+
+def plot_correlation_scatter(data, col1, col2):
+    """Plot a scatter of two strongly correlated columns."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    plt.scatter(data[col1], data[col2], alpha=0.5)
+    plt.xlabel(col1)
+    plt.ylabel(col2)
+    plt.title(f'Correlation between {col1} and {col2}')
+    return fig
+
+@st.cache_resource
+def get_chart_cache():
+    """Rendered chart images shared across reruns and sessions."""
+    return ChartCache()
+
+def plot_missing_values(data, summary=None):
+    """Plot the share of missing values per column and time bucket."""
+    if summary is None:
+        summary = summarize_missing(data)
+    fractions = summary['null_fraction']
     fig, ax = plt.subplots(figsize=(12, 6))
-    sns.heatmap(data.isnull(), yticklabels=False, cbar=False, cmap='viridis')
-    plt.title('Missing Values Heatmap')
+    image = ax.imshow(fractions.T.to_numpy(), aspect='auto', interpolation='nearest',
+                      cmap='viridis', vmin=0, vmax=1)
+    ax.set_yticks(range(len(fractions.columns)))
+    ax.set_yticklabels(fractions.columns)
+    ticks = np.linspace(0, len(fractions) - 1, min(len(fractions), 8)).astype(int)
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([str(fractions.index[i])[:16] for i in ticks], rotation=45, ha='right')
+    fig.colorbar(image, ax=ax, label='Fraction missing')
+    plt.title('Missing Values Over Time')
     return fig
 
 # Set style for plots
@@ -115,6 +192,31 @@ if page == "Data Upload":
         value=0.1,
         help="Lower values mean stricter anomaly detection"
     )
+    spike_windows = st.sidebar.text_input(
+        "Spike Detection Windows",
+        value="24",
+        help="Comma-separated row counts (e.g. 24) or time spans (e.g. 6h, 7D) preceding each point"
+    )
+    spike_threshold = st.sidebar.slider(
+        "Spike Threshold (σ)",
+        min_value=2.0,
+        max_value=6.0,
+        value=3.0,
+        step=0.5,
+        help="Deviation from the preceding window that counts as a spike"
+    )
+    robust_spikes = st.sidebar.checkbox(
+        "Robust Spike Detection",
+        value=False,
+        help="Use the rolling median and MAD instead of the mean and standard deviation"
+    )
+    detector_options = {'temporal_threshold': spike_threshold, 'temporal_robust': robust_spikes}
+    try:
+        detector_options['temporal_windows'] = [
+            parse_temporal_window(window) for window in spike_windows.split(',') if window.strip()
+        ]
+    except ValueError as e:
+        st.sidebar.error(f"{e}; using the default windows")
 
     # File upload widget
     uploaded_file = st.file_uploader("Choose a climate dataset (CSV or Excel)", type=["csv", "xlsx", "xls"])
@@ -136,6 +238,10 @@ if page == "Data Upload":
                 if isinstance(data, pd.DataFrame):
                     # Preprocess data
                     processed_data, validation_report = st.session_state.preprocessor.process_data(data)
+
+                    # Charts are rendered once per dataset and served from the cache on reruns
+                    chart_cache = get_chart_cache()
+                    data_hash = dataset_hash(processed_data)
                     
                     # Data Overview Section
                     st.subheader("Data Overview")
@@ -151,10 +257,15 @@ if page == "Data Upload":
 
                     # Missing Values Visualization
                     st.subheader("Missing Values Analysis")
-                    if processed_data.isnull().sum().sum() > 0:
-                        st.pyplot(plot_missing_values(processed_data))
+                    missing_summary = summarize_missing(processed_data)
+                    if missing_summary['null_counts'].sum() > 0:
+                        st.image(render_chart(chart_cache, data_hash, 'missing_values',
+                                              plot_missing_values, processed_data, missing_summary))
                         st.write("Missing values summary:")
-                        st.write(processed_data.isnull().sum())
+                        st.write(pd.DataFrame({
+                            'missing': missing_summary['null_counts'],
+                            'longest consecutive run': missing_summary['longest_run'],
+                        }))
                     else:
                         st.success("✓ No missing values found")
 
@@ -169,31 +280,29 @@ if page == "Data Upload":
                                                     numeric_cols)
                             
                             if selected_col:
-                                # Create a copy of the data for time series analysis
-                                ts_data = processed_data.copy()
-                                ts_data['timestamp'] = pd.to_datetime(ts_data['timestamp'])
-                                ts_data.set_index('timestamp', inplace=True)
-                                
-                                # Get anomaly indices
-                                anomaly_indices = []
-                                if validation_report['range_anomalies'].get(selected_col):
-                                    # Convert numeric indices to timestamps
-                                    anomaly_indices = ts_data.index[validation_report['range_anomalies'][selected_col]].tolist()
-                                
-                                st.pyplot(plot_time_series(ts_data, selected_col, anomaly_indices))
+                                st.image(render_chart(chart_cache, data_hash, 'time_series',
+                                                      plot_timestamp_series, processed_data, selected_col,
+                                                      validation_report['range_anomalies'].get(selected_col),
+                                                      column=selected_col))
+
+                    # Column sketches shared by the distribution plots and anomaly detection
+                    profiles = build_profiles(processed_data)
 
                     # Distribution Analysis
                     st.subheader("Distribution Analysis")
                     dist_col = st.selectbox("Select variable for distribution analysis:",
                                           processed_data.select_dtypes(include=['float64', 'int64']).columns)
                     if dist_col:
-                        st.pyplot(plot_distribution(processed_data, dist_col))
+                        st.image(render_chart(chart_cache, data_hash, 'distribution',
+                                              plot_distribution, processed_data, dist_col, profiles.get(dist_col),
+                                              column=dist_col))
 
                     # Correlation Analysis
                     st.subheader("Correlation Analysis")
-                    corr_fig = plot_correlation_heatmap(processed_data)
-                    if corr_fig:
-                        st.pyplot(corr_fig)
+                    corr_image = render_chart(chart_cache, data_hash, 'correlation_heatmap',
+                                              plot_correlation_heatmap, processed_data)
+                    if corr_image:
+                        st.image(corr_image)
                     else:
                         st.info("Not enough numeric columns for correlation analysis")
 
@@ -232,7 +341,10 @@ if page == "Data Upload":
 
                     # Run anomaly detection
                     st.subheader("Advanced Anomaly Detection")
-                    anomaly_report = detect_anomalies(processed_data)
+                    anomaly_report = detect_anomalies(processed_data, profiles, contamination=detection_threshold,
+                                                      detector_options=detector_options)
+                    for detector_name, error in anomaly_report['detector_errors'].items():
+                        st.warning(f"Detector '{detector_name}' did not complete: {error}")
                     
                     # Statistical Anomalies
                     if anomaly_report['statistical_anomalies']:
@@ -241,50 +353,55 @@ if page == "Data Upload":
                             if indices:
                                 st.write(f"- {col}: {len(indices)} anomalies")
                                 # Plot statistical anomalies
-                                fig, ax = plt.subplots(figsize=(10, 6))
-                                sns.boxplot(data=processed_data, y=col, ax=ax)
-                                sns.stripplot(data=processed_data.iloc[indices], y=col,
-                                            color='red', size=10, ax=ax)
-                                plt.title(f'Statistical Anomalies in {col}')
-                                st.pyplot(fig)
+                                st.image(render_chart(chart_cache, data_hash, 'statistical_anomalies',
+                                                      plot_statistical_anomalies, processed_data, col, indices,
+                                                      column=col))
                                 st.dataframe(processed_data.loc[indices, [col]])
                     else:
                         st.success("✅ No statistical anomalies found")
 
+                    # Robust (IQR) Outliers
+                    robust_counts = {col: len(indices) for col, indices in anomaly_report['robust_anomalies'].items() if indices}
+                    if robust_counts:
+                        st.warning("Robust Outliers (outside 1.5 × IQR fences):")
+                        for col, count in robust_counts.items():
+                            st.write(f"- {col}: {count} outliers")
+                    else:
+                        st.success("✅ No robust outliers found")
+
                     # Isolation Forest Anomalies
                     if anomaly_report['isolation_forest_anomalies']:
                         st.warning(f"Isolation Forest detected {len(anomaly_report['isolation_forest_anomalies'])} anomalies")
                         # Plot isolation forest anomalies in 2D
-                        numeric_cols = processed_data.select_dtypes(include=['float64', 'int64']).columns
-                        if len(numeric_cols) >= 2:
-                            fig, ax = plt.subplots(figsize=(10, 6))
-                            plt.scatter(processed_data[numeric_cols[0]], processed_data[numeric_cols[1]], 
-                                      alpha=0.5, label='Normal')
-                            anomaly_data = processed_data.iloc[anomaly_report['isolation_forest_anomalies']]
-                            plt.scatter(anomaly_data[numeric_cols[0]], anomaly_data[numeric_cols[1]], 
-                                      color='red', label='Anomaly')
-                            plt.xlabel(numeric_cols[0])
-                            plt.ylabel(numeric_cols[1])
-                            plt.title('Isolation Forest Anomalies')
-                            plt.legend()
-                            st.pyplot(fig)
+                        if_image = render_chart(chart_cache, data_hash, 'isolation_forest_anomalies',
+                                                plot_isolation_forest_anomalies, processed_data,
+                                                anomaly_report['isolation_forest_anomalies'],
+                                                params={'contamination': detection_threshold})
+                        if if_image:
+                            st.image(if_image)
                         st.dataframe(processed_data.loc[anomaly_report['isolation_forest_anomalies']])
                     else:
                         st.success("✅ No isolation forest anomalies found")
 
+                    # Temporal Spikes
+                    spike_counts = {col: len(indices) for col, indices in anomaly_report['temporal_anomalies'].items() if indices}
+                    if spike_counts:
+                        st.warning(f"Temporal Spikes (more than {spike_threshold:g}σ from the preceding window):")
+                        for col, count in spike_counts.items():
+                            st.write(f"- {col}: {count} spikes")
+                    else:
+                        st.success("✅ No temporal spikes found")
+
                     # Correlation Anomalies
                     if anomaly_report['correlation_anomalies']:
                         st.warning("Suspicious Correlations Found:")
                         for anomaly in anomaly_report['correlation_anomalies']:
                             st.write(f"- Strong correlation ({anomaly['correlation']:.2f}) between {anomaly['columns'][0]} and {anomaly['columns'][1]}")
                             # Plot correlation scatter
-                            fig, ax = plt.subplots(figsize=(10, 6))
-                            plt.scatter(processed_data[anomaly['columns'][0]], 
-                                      processed_data[anomaly['columns'][1]], alpha=0.5)
-                            plt.xlabel(anomaly['columns'][0])
-                            plt.ylabel(anomaly['columns'][1])
-                            plt.title(f'Correlation between {anomaly["columns"][0]} and {anomaly["columns"][1]}')
-                            st.pyplot(fig)
+                            st.image(render_chart(chart_cache, data_hash, 'correlation_scatter',
+                                                  plot_correlation_scatter, processed_data,
+                                                  anomaly['columns'][0], anomaly['columns'][1],
+                                                  column=tuple(anomaly['columns'])))
                     else:
                         st.success("✅ No suspicious correlations found")
 
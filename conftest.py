@@ -0,0 +1 @@
+# Lets the tests import app modules (utils.*, api) from the repository root.
@@ -0,0 +1,140 @@
+import time
+import warnings
+import pytest
+import pandas as pd
+import numpy as np
+from utils.anomaly_detection import DETECTORS, AnomalyDetector, detect_anomalies, register_detector
+from utils.sketches import build_profiles
+
+
+@pytest.fixture
+def temporary_detectors():
+    """Remove detectors registered by a test so they do not leak into other tests."""
+    before = set(DETECTORS)
+    yield
+    for name in set(DETECTORS) - before:
+        del DETECTORS[name]
+
+
+def make_data():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'temperature': rng.normal(15, 2, 200), 'humidity': rng.uniform(20, 90, 200)})
+
+
+def test_failing_detector_is_isolated(temporary_detectors):
+    @register_detector('broken_anomalies', default=list)
+    def _broken(detector, data):
+        raise RuntimeError("sensor table corrupt")
+
+    report = detect_anomalies(make_data(), detectors=['broken_anomalies', 'statistical_anomalies'])
+
+    assert report['broken_anomalies'] == []
+    assert report['detector_errors'] == {'broken_anomalies': "sensor table corrupt"}
+    assert set(report['statistical_anomalies']) == {'temperature', 'humidity'}
+
+
+def test_slow_detector_times_out(temporary_detectors):
+    @register_detector('slow_anomalies', default=list, timeout=0.1)
+    def _slow(detector, data):
+        time.sleep(1.0)
+        return [0]
+
+    started = time.monotonic()
+    report = detect_anomalies(make_data(), detectors=['slow_anomalies', 'statistical_anomalies'])
+
+    assert time.monotonic() - started < 0.9
+    assert report['slow_anomalies'] == []
+    assert report['detector_errors'] == {'slow_anomalies': "timed out after 0.1s"}
+    assert 'temperature' in report['statistical_anomalies']
+
+
+def test_timeout_excludes_time_spent_queued(temporary_detectors):
+    @register_detector('busy_anomalies', default=list)
+    def _busy(detector, data):
+        time.sleep(0.3)
+        return [1]
+
+    @register_detector('quick_anomalies', default=list, timeout=0.2)
+    def _quick(detector, data):
+        time.sleep(0.05)
+        return [2]
+
+    # With one worker the quick detector waits 0.3s in the queue, longer than its timeout
+    report = detect_anomalies(make_data(), detectors=['busy_anomalies', 'quick_anomalies'], max_workers=1)
+
+    assert report['detector_errors'] == {}
+    assert report['busy_anomalies'] == [1]
+    assert report['quick_anomalies'] == [2]
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError, match="Unknown executor"):
+        detect_anomalies(make_data(), executor='gpu')
+
+
+def make_noise(n=20_000, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'temperature': rng.normal(15, 2, n),
+    })
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'temporal_windows': (5,)},
+    {'temporal_windows': ('7D',)},
+    {'temporal_robust': True},
+])
+def test_temporal_defaults_rarely_flag_noise(options):
+    data = make_noise()
+    flagged = AnomalyDetector(**options).detect_temporal_anomalies(data)['temperature']
+    assert len(flagged) / len(data) < 0.005
+
+
+def test_temporal_spike_is_found_and_all_nan_columns_are_quiet():
+    data = make_noise(2_000)
+    data.loc[1_000, 'temperature'] = 40.0
+    data['humidity'] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        flagged = AnomalyDetector().detect_temporal_anomalies(data)
+
+    assert 1_000 in flagged['temperature']
+    assert flagged['humidity'] == []
+
+
+def test_detector_options_reach_the_detectors():
+    data = make_noise(2_000)
+    data.loc[1_000, 'temperature'] = 40.0
+
+    default = detect_anomalies(data, detectors=['temporal_anomalies'])
+    strict = detect_anomalies(data, detectors=['temporal_anomalies'],
+                              detector_options={'temporal_threshold': 50.0, 'temporal_robust': True})
+
+    assert 1_000 in default['temporal_anomalies']['temperature']
+    assert strict['temporal_anomalies']['temperature'] == []
+    with pytest.raises(ValueError, match="Invalid detector options"):
+        detect_anomalies(data, detector_options={'window': 5})
+
+
+def test_robust_anomalies_profile_columns_missing_from_profiles():
+    data = make_data()
+    data.loc[0, 'humidity'] = 500.0
+    profiles = build_profiles(data, columns=['temperature'])
+
+    anomalies = AnomalyDetector().detect_robust_anomalies(data, profiles)
+
+    assert 0 in anomalies['humidity']
+    assert anomalies == AnomalyDetector().detect_robust_anomalies(data)
+
+
+def test_isolation_forest_errors_are_reported():
+    data = make_data()
+    data.loc[0, 'temperature'] = np.inf
+
+    report = detect_anomalies(data, detectors=['isolation_forest_anomalies'])
+
+    assert report['isolation_forest_anomalies'] == []
+    assert 'isolation_forest_anomalies' in report['detector_errors']
@@ -0,0 +1,168 @@
+import os
+import pytest
+import pandas as pd
+import numpy as np
+from fastapi.testclient import TestClient
+import api
+
+
+def make_csv(periods=120):
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range('2024-01-01', periods=periods, freq='h')
+    data = pd.DataFrame({
+        'timestamp': timestamps,
+        'Timestamp': timestamps,
+        'Location': 'station-1',
+        'temperature': 15 + rng.normal(0, 2, periods),
+    })
+    return data.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(api, 'STATE_FOLDER', str(tmp_path / 'state'))
+    return tmp_path
+
+
+@pytest.fixture
+def client(folders):
+    with TestClient(api.create_app(max_workers=2, max_queue=1)) as client:
+        yield client
+
+
+def test_validate_file(client):
+    response = client.post('/validate', params={'filename': 'station.csv'}, content=make_csv())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['filename'] == 'station.csv'
+    assert body['shape'] == [120, 4]
+    assert body['anomaly_report']['detector_errors'] == {}
+    assert client.get('/metrics').json()['completed'] == 1
+
+
+def test_validate_with_dataset_key_reuses_nothing_for_a_new_feed(client):
+    response = client.post('/validate', params={'filename': 'station.csv', 'dataset_key': 'station-1'},
+                           content=make_csv())
+
+    assert response.status_code == 200
+    assert response.json()['validation_report']['incremental'] == {'reused_rows': 0, 'validated_rows': 120}
+
+
+def test_unsupported_extension_is_415(client):
+    response = client.post('/validate', params={'filename': 'station.json'}, content=b'{}')
+    assert response.status_code == 415
+
+
+def test_unreadable_file_is_422(client, folders):
+    response = client.post('/validate', params={'filename': 'empty.csv'}, content=b'')
+
+    assert response.status_code == 422
+    assert os.listdir(folders / 'uploads') == []
+
+
+def test_full_pool_is_503_before_the_body_is_stored(client, folders):
+    pool = client.app.state.pool
+    pool.reserve(pool.capacity)
+    try:
+        response = client.post('/validate', params={'filename': 'station.csv'}, content=make_csv())
+    finally:
+        pool.release(pool.capacity)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert not os.path.exists(folders / 'uploads')
+    metrics = client.get('/metrics').json()
+    assert metrics['rejected'] == 1
+    assert metrics['reserved'] == 0
+
+
+def test_batch_reports_each_file(client):
+    files = [
+        ('files', ('a.csv', make_csv(), 'text/csv')),
+        ('files', ('b.csv', make_csv(48), 'text/csv')),
+        ('files', ('c.txt', b'not a table', 'text/plain')),
+    ]
+    response = client.post('/validate/batch', files=files)
+
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [result['status'] for result in results] == ['ok', 'ok', 'error']
+    assert results[1]['shape'] == [48, 4]
+    assert results[2]['status_code'] == 415
+    assert client.get('/metrics').json()['reserved'] == 0
+
+
+def test_batch_larger_than_the_pool_is_rejected(client):
+    files = [('files', (f'{i}.csv', make_csv(), 'text/csv')) for i in range(4)]
+    response = client.post('/validate/batch', files=files)
+    assert response.status_code == 413
+
+
+def test_batch_is_503_before_the_body_is_stored(client, folders):
+    pool = client.app.state.pool
+    pool.reserve(pool.capacity)
+    try:
+        response = client.post('/validate/batch', files=[('files', ('a.csv', make_csv(), 'text/csv'))])
+    finally:
+        pool.release(pool.capacity)
+
+    assert response.status_code == 503
+    assert not os.path.exists(folders / 'uploads')
+    assert client.get('/metrics').json()['reserved'] == 0
+
+
+def test_batch_files_without_a_slot_are_skipped(client, folders):
+    pool = client.app.state.pool
+    pool.reserve(pool.capacity - 1)
+    try:
+        files = [('files', (f'{name}.csv', make_csv(), 'text/csv')) for name in 'ab']
+        response = client.post('/validate/batch', files=files)
+    finally:
+        pool.release(pool.capacity - 1)
+
+    results = response.json()['results']
+    assert [result['status'] for result in results] == ['ok', 'error']
+    assert results[1]['status_code'] == 503
+    assert os.listdir(folders / 'uploads') == []
+    assert client.get('/metrics').json()['reserved'] == 0
+
+
+def test_batch_size_limits(folders):
+    small, large = make_csv(10), make_csv(120)
+    app = api.create_app(max_workers=2, max_queue=1, max_upload_bytes=len(small) + 1,
+                         max_batch_bytes=3 * len(large))
+    with TestClient(app) as client:
+        assert client.post('/validate', params={'filename': 'large.csv'}, content=large).status_code == 413
+
+        response = client.post('/validate/batch', files=[
+            ('files', ('small.csv', small, 'text/csv')),
+            ('files', ('large.csv', large, 'text/csv')),
+        ])
+        results = response.json()['results']
+        assert [result['status'] for result in results] == ['ok', 'error']
+        assert results[1]['status_code'] == 413
+
+        too_much = [('files', (f'{i}.csv', large, 'text/csv')) for i in range(3)]
+        assert client.post('/validate/batch', files=too_much).status_code == 413
+        assert client.get('/metrics').json()['reserved'] == 0
+    assert os.listdir(folders / 'uploads') == []
+
+
+def test_batch_requires_multipart(client):
+    response = client.post('/validate/batch', content=make_csv(), headers={'content-type': 'text/csv'})
+    assert response.status_code == 415
+
+
+def test_metrics(client):
+    metrics = client.get('/metrics').json()
+    assert metrics == {
+        'max_workers': 2, 'max_queue': 1, 'running': 0, 'queue_depth': 0,
+        'reserved': 0, 'completed': 0, 'failed': 0, 'rejected': 0,
+    }
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError, match="Unknown executor"):
+        api.ValidationWorkerPool(executor='gpu')
@@ -0,0 +1,77 @@
+import pandas as pd
+import numpy as np
+from utils.file_handler import extract_data
+
+
+def write_workbook(path):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=3, freq='h'),
+            'temperature': [1.0, 2.0, np.nan],
+            'humidity': [40.0, 41.0, 42.0],
+        }).to_excel(writer, sheet_name='north', index=False)
+        pd.DataFrame({
+            'timestamp': pd.date_range('2024-02-01', periods=2, freq='h'),
+            'temperature': [3.0, 4.0],
+            'humidity': [50.0, 51.0],
+        }).to_excel(writer, sheet_name='south', index=False)
+        pd.DataFrame().to_excel(writer, sheet_name='notes', index=False)
+
+
+def test_multi_sheet_workbook_is_combined_with_sheet_column(tmp_path):
+    path = str(tmp_path / 'stations.xlsx')
+    write_workbook(path)
+
+    data = extract_data(path)
+
+    assert len(data) == 5
+    assert data['sheet'].tolist() == ['north'] * 3 + ['south'] * 2
+    assert pd.api.types.is_datetime64_any_dtype(data['timestamp'])
+    assert data['temperature'].isna().sum() == 1
+
+
+def test_single_sheet_workbook_has_no_sheet_column(tmp_path):
+    path = str(tmp_path / 'single.xlsx')
+    pd.DataFrame({'temperature': [1.0, 2.0]}).to_excel(path, index=False)
+
+    data = extract_data(path)
+
+    assert data.columns.tolist() == ['temperature']
+
+
+def test_usecols_projection(tmp_path):
+    path = str(tmp_path / 'stations.xlsx')
+    write_workbook(path)
+
+    data = extract_data(path, usecols=['timestamp', 'humidity'])
+
+    assert data.columns.tolist() == ['timestamp', 'humidity', 'sheet']
+
+
+def test_extension_is_case_insensitive(tmp_path):
+    lower_path = tmp_path / 'data.xlsx'
+    pd.DataFrame({'temperature': [1.0, 2.0]}).to_excel(lower_path, index=False)
+    path = str(lower_path.rename(tmp_path / 'DATA.XLSX'))
+    csv_path = tmp_path / 'DATA.CSV'
+    csv_path.write_text('temperature\n1.0\n2.0\n')
+
+    assert extract_data(path)['temperature'].tolist() == [1.0, 2.0]
+    assert extract_data(str(csv_path))['temperature'].tolist() == [1.0, 2.0]
+
+
+def test_unsupported_extension_returns_none(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_text('temperature\n1.0\n')
+
+    assert extract_data(str(path)) is None
+
+
+def test_existing_sheet_column_is_kept(tmp_path):
+    path = str(tmp_path / 'labelled.xlsx')
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'sheet': ['A1', 'A2'], 'temperature': [1.0, 2.0]}).to_excel(writer, sheet_name='north', index=False)
+        pd.DataFrame({'temperature': [3.0]}).to_excel(writer, sheet_name='south', index=False)
+
+    data = extract_data(path)
+
+    assert data['sheet'].tolist() == ['A1', 'A2', 'south']
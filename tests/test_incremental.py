@@ -0,0 +1,135 @@
+import threading
+import pandas as pd
+import numpy as np
+from utils.data_preprocessing import DataPreprocessor
+from utils.anomaly_detection import AnomalyDetector
+from utils.incremental import IncrementalValidator
+from utils.sketches import build_profiles
+
+
+def make_feed(periods=240, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=periods, freq='h')
+    data = pd.DataFrame({
+        'timestamp': timestamps,
+        'Timestamp': timestamps,
+        'Location': 'station-1',
+        'temperature': 15 + rng.normal(0, 2, periods),
+        'precipitation': rng.uniform(0, 20, periods),
+    })
+    data.loc[[30, 200], 'temperature'] = [80.0, -70.0]
+    data = data.drop(index=[50, 51, 52, 210])
+    # An exact repeat of an earlier row
+    return pd.concat([data, data.iloc[[180]]], ignore_index=True)
+
+
+def assert_same_findings(incremental, anomalies, data):
+    _, full = DataPreprocessor().process_data(data)
+    assert incremental['range_anomalies'] == full['range_anomalies']
+    assert incremental['duplicates'] == full['duplicates']
+    for key in ['temporal_inconsistencies', 'duplicate_timestamps', 'irregular_timestamps']:
+        assert sorted(incremental[key]) == sorted(full[key]), key
+    pd.testing.assert_frame_equal(
+        incremental['gap_index'].reset_index(drop=True),
+        full['gap_index'].reset_index(drop=True),
+        check_dtype=False,
+    )
+
+    detector = AnomalyDetector()
+    profiles = build_profiles(data)
+    expected = {
+        'statistical_anomalies': detector.detect_statistical_anomalies(data, profiles),
+        'robust_anomalies': detector.detect_robust_anomalies(data, profiles),
+        'temporal_anomalies': detector.detect_temporal_anomalies(data),
+    }
+    for key, findings in expected.items():
+        assert {col: sorted(labels) for col, labels in anomalies[key].items()} == \
+            {col: sorted(labels) for col, labels in findings.items()}, key
+
+
+def test_append_matches_full_validation(tmp_path):
+    data = make_feed()
+    validator = IncrementalValidator(state_dir=str(tmp_path), chunk_size=50)
+
+    validator.validate('feed', data.iloc[:120])
+    validation, anomalies = validator.validate('feed', data)
+
+    assert validation['incremental'] == {'reused_rows': 100, 'validated_rows': len(data) - 100}
+    assert_same_findings(validation, anomalies, data)
+
+
+def test_late_rows_repeating_stored_timestamps_are_duplicates(tmp_path):
+    data = make_feed(600)
+    # A late reading for an hour that was committed in an earlier run
+    late = data.iloc[[99]].assign(temperature=data['temperature'].iloc[99] + 0.1)
+    data = pd.concat([data, late], ignore_index=True)
+    validator = IncrementalValidator(state_dir=str(tmp_path), chunk_size=50)
+
+    for end in (120, 300, 450):
+        validator.validate('feed', data.iloc[:end])
+    validation, anomalies = validator.validate('feed', data)
+
+    assert len(data) - 1 in validation['duplicate_timestamps']
+    assert_same_findings(validation, anomalies, data)
+
+
+def test_changed_prefix_revalidates_everything(tmp_path):
+    data = make_feed()
+    validator = IncrementalValidator(state_dir=str(tmp_path), chunk_size=50)
+    validator.validate('feed', data.iloc[:120])
+
+    changed = data.copy()
+    changed.loc[3, 'precipitation'] = 999.0
+    validation, anomalies = validator.validate('feed', changed)
+
+    assert validation['incremental'] == {'reused_rows': 0, 'validated_rows': len(changed)}
+    assert_same_findings(validation, anomalies, changed)
+
+
+def test_stored_flags_are_rescored_with_merged_statistics(tmp_path):
+    # A step that looks extreme in the first chunk is ordinary once later rows arrive
+    values = np.r_[np.zeros(49), 10.0, np.full(50, 10.0), np.zeros(10)]
+    timestamps = pd.date_range('2024-01-01', periods=len(values), freq='h')
+    data = pd.DataFrame({
+        'timestamp': timestamps,
+        'Timestamp': timestamps,
+        'Location': 'station-1',
+        'temperature': values + np.tile([0.1, -0.1], len(values) // 2),
+    })
+    validator = IncrementalValidator(state_dir=str(tmp_path), chunk_size=50)
+
+    _, first = validator.validate('feed', data.iloc[:50])
+    assert first['statistical_anomalies']['temperature'] == [49]
+
+    _, anomalies = validator.validate('feed', data)
+    assert anomalies['statistical_anomalies']['temperature'] == []
+    assert anomalies['robust_anomalies']['temperature'] == []
+
+
+def test_runs_for_the_same_key_are_serialized(tmp_path):
+    data = make_feed()
+    holder = IncrementalValidator(state_dir=str(tmp_path), chunk_size=50)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(
+        IncrementalValidator(state_dir=str(tmp_path), chunk_size=50).validate('feed', data)
+    ))
+
+    with holder._locked('feed'):
+        worker.start()
+        worker.join(timeout=0.5)
+        assert worker.is_alive() and not results
+    worker.join()
+
+    assert results[0][0]['incremental']['validated_rows'] == len(data)
+
+
+def test_changed_detector_settings_revalidate_everything(tmp_path):
+    data = make_feed()
+    IncrementalValidator(state_dir=str(tmp_path), chunk_size=50).validate('feed', data.iloc[:120])
+
+    validator = IncrementalValidator(state_dir=str(tmp_path), chunk_size=50,
+                                     detector=AnomalyDetector(temporal_windows=(24, '7D')))
+    validation, anomalies = validator.validate('feed', data)
+
+    assert validation['incremental'] == {'reused_rows': 0, 'validated_rows': len(data)}
+    assert anomalies['temporal_anomalies'] == validator.detector.detect_temporal_anomalies(data)
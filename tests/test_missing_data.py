@@ -0,0 +1,72 @@
+import pandas as pd
+import numpy as np
+from utils.missing_data import null_runs, summarize_missing
+
+
+def test_null_runs():
+    mask = np.array([True, True, False, True, False, False, True])
+    assert null_runs(mask).tolist() == [[0, 2], [3, 1], [6, 1]]
+    assert null_runs(np.zeros(3, dtype=bool)).shape == (0, 2)
+
+
+def test_bucket_fractions_and_runs():
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=8, freq='h'),
+        'temperature': [1.0, np.nan, np.nan, 4.0, 5.0, 6.0, np.nan, 8.0],
+        'humidity': [40.0] * 8,
+    }, index=list('abcdefgh'))
+    # Shuffled rows are put back in time order
+    summary = summarize_missing(data.iloc[::-1], buckets=2)
+
+    assert summary['row_counts'].tolist() == [4, 4]
+    assert summary['null_fraction']['temperature'].tolist() == [0.5, 0.25]
+    assert summary['null_fraction']['humidity'].tolist() == [0.0, 0.0]
+    assert summary['null_fraction'].index.tolist() == [
+        pd.Timestamp('2024-01-01 00:00'), pd.Timestamp('2024-01-01 03:30'),
+    ]
+    runs = summary['null_runs']
+    assert runs[['start', 'end', 'length']].values.tolist() == [['b', 'c', 2], ['g', 'g', 1]]
+    assert (runs['column'] == 'temperature').all()
+    assert summary['longest_run'].to_dict() == {'timestamp': 0, 'temperature': 2, 'humidity': 0}
+
+
+def test_bucket_starts_are_exact():
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2000-01-01', periods=241, freq='h'),
+        'temperature': 1.0,
+    })
+    starts = summarize_missing(data, buckets=24)['null_fraction'].index
+
+    assert (starts == pd.date_range('2000-01-01', periods=24, freq='10h')).all()
+
+
+def test_rows_without_timestamp_only_count_as_nulls():
+    data = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01 00:00', None, '2024-01-01 02:00']),
+        'temperature': [1.0, np.nan, np.nan],
+    })
+    summary = summarize_missing(data, buckets=2)
+
+    assert summary['null_counts'].to_dict() == {'timestamp': 1, 'temperature': 2}
+    assert summary['row_counts'].sum() == 2
+    assert summary['null_fraction']['temperature'].tolist() == [0.0, 1.0]
+
+
+def test_frame_without_time_column_uses_row_order():
+    data = pd.DataFrame({'temperature': [np.nan, 1.0, 2.0, np.nan]})
+    summary = summarize_missing(data, buckets=2)
+
+    assert summary['null_fraction'].index.name == 'row'
+    assert summary['null_fraction'].index.tolist() == [0, 2]
+    assert summary['null_fraction']['temperature'].tolist() == [0.5, 0.5]
+    assert summary['null_runs']['start'].tolist() == [0, 3]
+
+
+def test_empty_frame():
+    summary = summarize_missing(pd.DataFrame({'timestamp': pd.Series(dtype='datetime64[ns]'),
+                                              'temperature': pd.Series(dtype='float64')}))
+
+    assert summary['null_counts'].to_dict() == {'timestamp': 0, 'temperature': 0}
+    assert summary['row_counts'].sum() == 0
+    assert summary['null_runs'].empty
+    assert summary['longest_run'].to_dict() == {'timestamp': 0, 'temperature': 0}
@@ -0,0 +1,38 @@
+import pytest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+from utils.rendering import ChartCache, dataset_hash, render_chart
+
+
+def test_chart_is_drawn_once_per_key():
+    data = pd.DataFrame({'temperature': [1.0, 2.0, 3.0]})
+    cache = ChartCache()
+    calls = []
+
+    def plot(frame):
+        calls.append(1)
+        fig, ax = plt.subplots()
+        ax.plot(frame['temperature'])
+        return fig
+
+    key_args = (cache, dataset_hash(data), 'line', plot, data)
+    first = render_chart(*key_args, column='temperature', params={'contamination': 0.1})
+    second = render_chart(*key_args, column='temperature', params={'contamination': 0.1})
+    render_chart(*key_args, column='temperature', params={'contamination': 0.05})
+
+    assert first == second and first.startswith(b'\x89PNG')
+    assert len(calls) == 2
+    assert plt.get_fignums() == []
+
+
+def test_failing_plot_closes_its_figures():
+    def plot():
+        plt.subplots()
+        raise ValueError("nothing to plot")
+
+    with pytest.raises(ValueError):
+        render_chart(ChartCache(), 'hash', 'broken', plot)
+
+    assert plt.get_fignums() == []
@@ -0,0 +1,138 @@
+import pandas as pd
+import numpy as np
+import pytest
+from utils.sketches import (
+    ColumnProfile, FixedBinHistogram, HyperLogLog, TDigest, build_profiles, merge_profiles
+)
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).normal(10, 3, 200_000)
+
+
+def test_tdigest_quantile_error(values):
+    digest = TDigest()
+    for chunk in np.array_split(values, 20):
+        digest.update(chunk)
+
+    qs = np.array([0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+    # Rank error stays well below 1% across the distribution
+    ranks = np.searchsorted(np.sort(values), digest.quantile(qs)) / len(values)
+    assert np.max(np.abs(ranks - qs)) < 0.005
+    assert digest.quantile(0.0) == values.min()
+    assert digest.quantile(1.0) == values.max()
+    assert len(digest.means) < 200
+
+
+def test_tdigest_merge_matches_single_digest(values):
+    left, right = TDigest().update(values[:50_000]), TDigest().update(values[50_000:])
+    merged = left.merge(right)
+    assert merged.count == len(values)
+    assert abs(merged.quantile(0.5) - np.median(values)) < 0.05
+
+
+def test_tdigest_empty_returns_nan():
+    assert np.isnan(TDigest().quantile(0.5))
+
+
+@pytest.mark.parametrize('distinct', [10, 1_000, 100_000])
+def test_hyperloglog_estimate(distinct):
+    sketch = HyperLogLog()
+    data = np.arange(distinct).repeat(3)
+    for chunk in np.array_split(data, 7):
+        sketch.update(chunk)
+    assert abs(sketch.estimate() - distinct) / distinct < 0.03
+
+
+def test_hyperloglog_merge_counts_union():
+    left = HyperLogLog().update(np.arange(0, 60_000))
+    right = HyperLogLog().update(np.arange(40_000, 100_000))
+    assert abs(left.merge(right).estimate() - 100_000) / 100_000 < 0.03
+
+
+def test_hyperloglog_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(14))
+
+
+def exact_counts(histogram, values):
+    return np.histogram(values, bins=histogram.edges)[0]
+
+
+def test_histogram_grows_to_cover_new_values():
+    histogram = FixedBinHistogram(16)
+    batches = [np.array([0.5, 0.6]), np.array([-100.0]), np.array([1000.0, 3.25])]
+    for batch in batches:
+        histogram.update(batch)
+    values = np.concatenate(batches)
+
+    assert histogram.counts.sum() == len(values)
+    assert histogram.edges[0] <= values.min() and histogram.edges[-1] > values.max()
+    assert np.array_equal(histogram.counts, exact_counts(histogram, values))
+
+
+def test_histogram_merge_across_exponents_and_offsets():
+    rng = np.random.default_rng(1)
+    narrow = rng.uniform(-1, 1, 5_000)      # small bin width near zero
+    wide = rng.uniform(500, 9_000, 5_000)   # much larger width, far offset
+
+    merged = FixedBinHistogram(32).update(narrow)
+    other = FixedBinHistogram(32).update(wide)
+    assert merged.exponent < other.exponent
+    merged.merge(other)
+
+    values = np.concatenate((narrow, wide))
+    assert merged.counts.sum() == len(values)
+    assert np.array_equal(merged.counts, exact_counts(merged, values))
+    # Merging must not modify the other histogram
+    assert other.counts.sum() == len(wide)
+
+    reverse = FixedBinHistogram(32).update(wide).merge(FixedBinHistogram(32).update(narrow))
+    assert np.array_equal(reverse.counts, exact_counts(reverse, values))
+
+
+def test_column_profile_merge_matches_single_pass(values):
+    series = pd.Series(values)
+    series.iloc[::1000] = np.nan
+    single = ColumnProfile().update(series)
+    parts = [ColumnProfile().update(chunk) for chunk in np.array_split(series, 5)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert merged.count == single.count == series.count()
+    assert merged.null_count == single.null_count == series.isna().sum()
+    assert merged.mean == pytest.approx(series.mean(), rel=1e-12)
+    assert merged.std == pytest.approx(series.std(), rel=1e-9)
+    assert np.array_equal(merged.histogram.counts, single.histogram.counts)
+    assert merged.quantile(0.5) == pytest.approx(single.quantile(0.5), abs=0.02)
+
+
+def test_merge_profiles_across_files():
+    rng = np.random.default_rng(2)
+    first = pd.DataFrame({'temperature': rng.normal(size=1_000), 'humidity': rng.normal(size=1_000)})
+    second = pd.DataFrame({'temperature': rng.normal(size=500)})
+
+    merged = merge_profiles(build_profiles(first), build_profiles(second))
+    combined = pd.concat([first, second])
+
+    assert merged['temperature'].count == 1_500
+    assert merged['temperature'].mean == pytest.approx(combined['temperature'].mean())
+    assert merged['humidity'].count == 1_000
+
+
+def test_distinct_count_ignores_int_and_float_dtypes():
+    ints = ColumnProfile().update(pd.Series([1, 2, 3]))
+    floats = ColumnProfile().update(pd.Series([1.0, 2.0, 3.0, None]))
+
+    assert round(ints.merge(floats).distinct.estimate()) == 3
+
+
+def test_infinite_values_are_left_out_of_moments():
+    profile = ColumnProfile().update(pd.Series([1.0, 2.0, 3.0, np.inf, -np.inf]))
+
+    assert profile.count == 3
+    assert profile.mean == pytest.approx(2.0)
+    assert profile.std == pytest.approx(1.0)
+    assert profile.max == 3.0
@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+from utils.data_preprocessing import DataPreprocessor
+from utils.temporal_gaps import analyze_gaps, expand_gap_index, to_int64_timestamps
+
+
+def make_station_data(location_values=(1.0, 2.0)):
+    frames = []
+    for location in location_values:
+        timestamps = pd.date_range('2024-01-01', periods=24, freq='h').delete([5, 6, 7, 15])
+        frames.append(pd.DataFrame({
+            'timestamp': timestamps,
+            'location': location,
+            'temperature': np.linspace(10, 20, len(timestamps)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_gap_index_and_frequency():
+    data = make_station_data()
+    report = DataPreprocessor().analyze_temporal_gaps(data)
+
+    assert report['frequency'] == {1.0: pd.Timedelta('1h').value, 2.0: pd.Timedelta('1h').value}
+    gap_index = report['gap_index']
+    assert gap_index['series'].tolist() == [1.0, 1.0, 2.0, 2.0]
+    assert gap_index['missing_count'].tolist() == [3, 1, 3, 1]
+    assert gap_index['start'].iloc[0] == pd.Timestamp('2024-01-01 05:00')
+    assert gap_index['end'].iloc[0] == pd.Timestamp('2024-01-01 07:00')
+
+
+def test_duplicate_and_irregular_timestamps():
+    timestamps = pd.to_datetime([
+        '2024-01-01 00:00', '2024-01-01 01:00', '2024-01-01 01:00',
+        '2024-01-01 02:00', '2024-01-01 02:30', '2024-01-01 03:00', '2024-01-01 04:00',
+    ])
+    report = analyze_gaps(to_int64_timestamps(timestamps))
+
+    assert report['frequency'] == {None: pd.Timedelta('1h').value}
+    assert report['duplicate_positions'].tolist() == [2]
+    assert report['irregular_positions'].tolist() == [4, 5]
+    assert report['gap_index'].empty
+
+
+def test_unordered_input_reports_original_positions():
+    timestamps = pd.to_datetime(['2024-01-01 03:00', '2024-01-01 00:00', '2024-01-01 01:00'])
+    report = analyze_gaps(to_int64_timestamps(timestamps))
+
+    assert report['gap_positions'].tolist() == [0]
+    assert report['gap_index']['missing_count'].tolist() == [1]
+
+
+def test_expand_gap_index():
+    data = make_station_data(location_values=('a',))
+    report = analyze_gaps(to_int64_timestamps(data['timestamp']))
+    missing = expand_gap_index(report['gap_index'], report['frequency'])
+
+    assert missing['timestamp'].tolist() == list(pd.to_datetime([
+        '2024-01-01 05:00', '2024-01-01 06:00', '2024-01-01 07:00', '2024-01-01 15:00'
+    ]))
+
+
+def test_fill_gaps_round_trip_keeps_labels_and_dtypes():
+    preprocessor = DataPreprocessor()
+    data = make_station_data()
+    report = preprocessor.analyze_temporal_gaps(data)
+    filled = preprocessor.fill_gaps(data, report['gap_index'], report['frequency'])
+
+    assert len(filled) == 48
+    assert filled['location'].dtype == data['location'].dtype
+    # Filled records sit inside their series, in time order
+    for location, group in filled.groupby('location'):
+        expected = pd.date_range('2024-01-01', periods=24, freq='h')
+        assert group['timestamp'].tolist() == list(expected)
+    # Existing records keep their labels
+    pd.testing.assert_frame_equal(filled.loc[data.index], data)
+
+    # Filling again finds nothing left to fill
+    refilled = preprocessor.analyze_temporal_gaps(filled)
+    assert refilled['gap_index'].empty
+
+
+def test_process_data_fill_gaps_imputes_inserted_rows():
+    data = make_station_data()
+    data['Timestamp'] = data['timestamp']
+    data['Location'] = data['location']
+    processed, report = DataPreprocessor().process_data(data, fill_gaps=True)
+
+    assert len(report['filled_gap_rows']) == 8
+    assert report['temporal_inconsistencies'] == [5, 12, 25, 32]
+    assert processed.loc[report['filled_gap_rows'], 'temperature'].notna().all()
@@ -1,27 +1,133 @@
+import time
+import multiprocessing
 import pandas as pd
 import numpy as np
+from scipy import stats
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from typing import Dict, List, Union, Optional
+from typing import Any, Callable, Dict, Iterable, List, Union, Optional
+from utils.sketches import ColumnProfile, TDigest, build_profiles, iter_chunks
+from utils.temporal_gaps import to_int64_timestamps
+
+TemporalWindow = Union[int, str, pd.Timedelta]
+
+
+def parse_temporal_window(value: Union[str, int]) -> TemporalWindow:
+    """Parse a window setting: a row count ('24') or a time span ('6h', '7D')."""
+    if isinstance(value, (int, np.integer)) or str(value).strip().isdigit():
+        window = int(value)
+        if window < 2:
+            raise ValueError(f"Row windows need at least 2 rows: {value}")
+        return window
+    try:
+        span = pd.Timedelta(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid temporal window: {value!r}")
+    if span <= pd.Timedelta(0):
+        raise ValueError(f"Temporal window must be positive: {value!r}")
+    return span
+
+
+def _rolling_bounds(sorted_timestamps: np.ndarray, window: TemporalWindow) -> np.ndarray:
+    """Start position of the window preceding each point (rows or a time span)."""
+    n = len(sorted_timestamps)
+    if isinstance(window, (int, np.integer)):
+        return np.maximum(np.arange(n) - int(window), 0)
+    span = pd.Timedelta(window).value
+    return np.searchsorted(sorted_timestamps, sorted_timestamps - span, side='left')
 
 class AnomalyDetector:
-    def __init__(self, contamination: float = 0.1):
+    def __init__(
+        self,
+        contamination: float = 0.1,
+        temporal_windows: Iterable[TemporalWindow] = (24,),
+        temporal_threshold: float = 3.0,
+        temporal_min_periods: int = 8,
+        temporal_robust: bool = False
+    ):
         self.isolation_forest = IsolationForest(
             contamination=contamination,
             random_state=42
         )
         self.scaler = StandardScaler()
+        self.temporal_windows = tuple(temporal_windows)
+        self.temporal_threshold = temporal_threshold
+        self.temporal_min_periods = temporal_min_periods
+        self.temporal_robust = temporal_robust
         
-    def detect_statistical_anomalies(self, data: pd.DataFrame) -> Dict[str, List[int]]:
-        """Detect anomalies using statistical methods (Z-score)."""
+    def detect_statistical_anomalies(
+        self,
+        data: pd.DataFrame,
+        profiles: Optional[Dict[str, ColumnProfile]] = None
+    ) -> Dict[str, List[int]]:
+        """Detect anomalies using statistical methods (Z-score).
+
+        Mean and standard deviation come from ``profiles`` when given, so they
+        can be computed once over all chunks or partitions of a dataset.
+        """
         anomalies = {}
         numeric_cols = data.select_dtypes(include=['float64', 'int64']).columns
         
         for col in numeric_cols:
-            z_scores = np.abs((data[col] - data[col].mean()) / data[col].std())
+            if profiles and col in profiles:
+                mean, std = profiles[col].mean, profiles[col].std
+            else:
+                mean, std = data[col].mean(), data[col].std()
+            z_scores = np.abs((data[col] - mean) / std)
             anomalies[col] = data[z_scores > 3].index.tolist()  # 3 standard deviations
             
         return anomalies
+
+    def detect_robust_anomalies(
+        self,
+        data: pd.DataFrame,
+        profiles: Optional[Dict[str, ColumnProfile]] = None,
+        method: str = 'iqr',
+        threshold: Optional[float] = None,
+        chunk_size: int = 100_000
+    ) -> Dict[str, List[int]]:
+        """
+        Detect outliers with quantile-based rules that stream over chunks.
+
+        Args:
+            data (pd.DataFrame): The data to scan
+            profiles (dict): Precomputed column profiles (missing columns are profiled in one pass)
+            method (str): 'iqr' (Tukey fences) or 'mad' (median absolute deviation)
+            threshold (float): Fence multiplier (default 1.5 for IQR, 3.5 for MAD)
+            chunk_size (int): Rows per chunk for the MAD deviation pass
+
+        Returns:
+            dict: Column name -> index labels of outliers
+        """
+        if method not in ('iqr', 'mad'):
+            raise ValueError(f"Unknown robust outlier method: {method}")
+        numeric_cols = data.select_dtypes(include=['float64', 'int64']).columns
+        # Columns the caller did not profile are profiled here in one pass
+        missing = [col for col in numeric_cols if not profiles or col not in profiles]
+        if missing:
+            profiles = {**(profiles or {}), **build_profiles(data, columns=missing, chunk_size=chunk_size)}
+
+        anomalies = {}
+        for col in numeric_cols:
+            profile = profiles[col]
+            if method == 'iqr':
+                q1, q3 = profile.quantile(np.array([0.25, 0.75]))
+                spread = (threshold or 1.5) * (q3 - q1)
+                low, high = q1 - spread, q3 + spread
+            else:
+                median = profile.quantile(0.5)
+                # Second streaming pass: sketch of absolute deviations from the median
+                deviations = TDigest(profile.digest.compression)
+                for chunk in iter_chunks(data[col], chunk_size):
+                    deviations.update(np.abs(chunk.to_numpy(dtype='float64') - median))
+                # 1.4826 makes the MAD consistent with the standard deviation for normal data
+                spread = (threshold or 3.5) * 1.4826 * deviations.quantile(0.5)
+                low, high = median - spread, median + spread
+
+            anomalies[col] = data[(data[col] < low) | (data[col] > high)].index.tolist()
+
+        return anomalies
     
     def detect_isolation_forest_anomalies(self, data: pd.DataFrame) -> List[int]:
         """Detect anomalies using Isolation Forest."""
@@ -29,37 +135,145 @@ class AnomalyDetector:
         if numeric_data.empty:
             return []
             
-        try:
-            scaled_data = self.scaler.fit_transform(numeric_data)
-            predictions = self.isolation_forest.fit_predict(scaled_data)
-            return data[predictions == -1].index.tolist()
-        except Exception as e:
-            print(f"Error in isolation forest detection: {e}")
-            return []
+        # Errors (e.g. infinite values) propagate so detect_anomalies records them
+        scaled_data = self.scaler.fit_transform(numeric_data)
+        predictions = self.isolation_forest.fit_predict(scaled_data)
+        return data[predictions == -1].index.tolist()
     
-    def detect_temporal_anomalies(self, data: pd.DataFrame) -> Dict[str, List[int]]:
-        """Detect sudden changes or spikes in time series data."""
+    def detect_temporal_anomalies(
+        self,
+        data: pd.DataFrame,
+        windows: Optional[Iterable[TemporalWindow]] = None,
+        threshold: Optional[float] = None,
+        robust: Optional[bool] = None
+    ) -> Dict[str, List[int]]:
+        """
+        Detect sudden changes or spikes in time series data at several scales.
+
+        Each point is compared with the window that precedes it. Windows are
+        row counts (e.g. 5) or time spans (e.g. '6h', '7D'). Rolling mean and
+        variance for every window and every column come from one set of
+        cumulative sums over the float block, so extra windows cost little.
+
+        Args:
+            data (pd.DataFrame): Data with a 'timestamp' column
+            windows (list): Window sizes (default: the detector's temporal_windows)
+            threshold (float): Deviation (in standard deviations / scaled MADs) that counts as a spike.
+                It is read as a normal z-score and raised to the Student-t quantile with the
+                same tail probability for each window's sample count, so short windows do not
+                flag more noise than long ones (for the MAD rule this is an approximation).
+            robust (bool): Use rolling median and MAD instead of mean and standard deviation
+                (default: the detector's temporal_robust)
+
+        Returns:
+            dict: Column name -> index labels flagged at any scale, in time order
+        """
         anomalies = {}
         if 'timestamp' not in data.columns:
             return anomalies
-            
-        numeric_cols = data.select_dtypes(include=['float64', 'int64']).columns
-        data = data.sort_values('timestamp')
-        
-        for col in numeric_cols:
-            if col == 'timestamp':
-                continue
-                
-            # Calculate rolling statistics
-            rolling_mean = data[col].rolling(window=5).mean()
-            rolling_std = data[col].rolling(window=5).std()
-            
-            # Detect points that deviate significantly from rolling statistics
-            deviations = np.abs(data[col] - rolling_mean) / rolling_std
-            anomalies[col] = data[deviations > 3].index.tolist()
-            
+
+        windows = self.temporal_windows if windows is None else tuple(windows)
+        threshold = self.temporal_threshold if threshold is None else threshold
+        robust = self.temporal_robust if robust is None else robust
+        numeric_cols = [col for col in data.select_dtypes(include=['float64', 'int64']).columns
+                        if col != 'timestamp']
+        if not numeric_cols or not windows:
+            return anomalies
+
+        timestamps = to_int64_timestamps(data['timestamp'])
+        positions = np.flatnonzero(timestamps != np.iinfo('int64').min)
+        order = positions[np.argsort(timestamps[positions], kind='stable')]
+        sorted_ts = timestamps[order]
+        labels = data.index[order]
+        block = data[numeric_cols].to_numpy(dtype='float64')[order]
+
+        if robust:
+            flagged = self._robust_rolling_flags(block, sorted_ts, windows, threshold)
+        else:
+            flagged = self._rolling_flags(block, sorted_ts, windows, threshold)
+
+        for i, col in enumerate(numeric_cols):
+            anomalies[col] = labels[flagged[:, i]].tolist()
+
         return anomalies
-    
+
+    def _rolling_flags(self, block: np.ndarray, sorted_ts: np.ndarray,
+                       windows: Iterable[TemporalWindow], threshold: float) -> np.ndarray:
+        """Z-score of each point against the preceding window, from shared cumulative sums."""
+        valid = ~np.isnan(block)
+        # Centering keeps the cumulative sums well conditioned (all-NaN columns stay at zero)
+        n_valid = valid.sum(axis=0)
+        column_means = np.where(valid, block, 0.0).sum(axis=0) / np.maximum(n_valid, 1)
+        centered = np.where(valid, block - column_means, 0.0)
+        zeros = np.zeros((1, block.shape[1]))
+        sums = np.vstack((zeros, np.cumsum(centered, axis=0)))
+        squares = np.vstack((zeros, np.cumsum(centered ** 2, axis=0)))
+        counts = np.vstack((zeros, np.cumsum(valid, axis=0)))
+
+        # Rounding error of a difference of cumulative sums grows with their length
+        noise = 8 * np.finfo('float64').eps * len(block) * np.nanvar(centered, axis=0)
+
+        # The window ends right before the point (for time spans, ties are excluded too)
+        row_end = np.arange(len(sorted_ts))
+        time_end = np.searchsorted(sorted_ts, sorted_ts, side='left')
+        # Two-sided tail probability of the threshold under a normal distribution
+        tail = 2 * stats.norm.sf(threshold)
+        flagged = np.zeros(block.shape, dtype=bool)
+        for window in windows:
+            start = _rolling_bounds(sorted_ts, window)
+            if isinstance(window, (int, np.integer)):
+                end, min_count = row_end, int(window)
+            else:
+                end, min_count = time_end, self.temporal_min_periods
+
+            count = counts[end] - counts[start]
+            total = sums[end] - sums[start]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = total / count
+                var = (squares[end] - squares[start] - total * mean) / (count - 1)
+                # Flat windows only show rounding noise and would flag anything
+                std = np.sqrt(np.where(var * (count - 1) > noise, var, np.nan))
+                deviations = np.abs(centered - mean) / std
+            enough = valid & (count >= max(min_count, 2))
+            flagged |= enough & (deviations > self._t_thresholds(count, tail))
+
+        return flagged
+
+    @staticmethod
+    def _t_thresholds(count: np.ndarray, tail: float) -> np.ndarray:
+        """
+        Threshold on |x - mean| / std for a point that is not part of its window.
+
+        For normal data that ratio, divided by sqrt(1 + 1/n), follows a
+        Student-t distribution with n - 1 degrees of freedom.
+        """
+        sizes, inverse = np.unique(count, return_inverse=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            limits = np.sqrt(1 + 1 / sizes) * stats.t.isf(tail / 2, sizes - 1)
+        return np.where(sizes >= 2, limits, np.inf)[inverse].reshape(count.shape)
+
+    def _robust_rolling_flags(self, block: np.ndarray, sorted_ts: np.ndarray,
+                              windows: Iterable[TemporalWindow], threshold: float) -> np.ndarray:
+        """Scaled distance from the preceding window's median, in units of its MAD."""
+        frame = pd.DataFrame(block, index=pd.DatetimeIndex(sorted_ts.view('datetime64[ns]')))
+        tail = 2 * stats.norm.sf(threshold)
+        flagged = np.zeros(block.shape, dtype=bool)
+        for window in windows:
+            if isinstance(window, (int, np.integer)):
+                window, min_count = int(window), int(window)
+            else:
+                window, min_count = pd.Timedelta(window), self.temporal_min_periods
+            rolling = frame.rolling(window, min_periods=min_count, closed='left')
+            median = rolling.median()
+            # Rolling median of absolute deviations approximates the window MAD
+            mad = (frame - median).abs().rolling(window, min_periods=min_count, closed='left').median()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                deviations = ((frame - median).abs() / (1.4826 * mad.where(mad > 0))).to_numpy()
+            # The same small-sample correction as the mean/std rule (an approximation for the MAD)
+            count = rolling.count().fillna(0).to_numpy(dtype='int64')
+            flagged |= deviations > self._t_thresholds(count, tail)
+        return flagged
+
     def detect_correlation_anomalies(self, data: pd.DataFrame) -> List[Dict[str, Union[int, str]]]:
         """Detect anomalies in correlations between variables."""
         anomalies = []
@@ -87,21 +301,207 @@ class AnomalyDetector:
                     
         return anomalies
 
-def detect_anomalies(data: pd.DataFrame) -> Dict[str, Union[List, Dict]]:
-    """Main function to detect all types of anomalies in the dataset."""
-    detector = AnomalyDetector()
-    
-    anomaly_report = {
-        'statistical_anomalies': {},
-        'isolation_forest_anomalies': [],
-        'temporal_anomalies': {},
-        'correlation_anomalies': [],
-    }
-    
-    if isinstance(data, pd.DataFrame):
-        anomaly_report['statistical_anomalies'] = detector.detect_statistical_anomalies(data)
-        anomaly_report['isolation_forest_anomalies'] = detector.detect_isolation_forest_anomalies(data)
-        anomaly_report['temporal_anomalies'] = detector.detect_temporal_anomalies(data)
-        anomaly_report['correlation_anomalies'] = detector.detect_correlation_anomalies(data)
-    
+class DetectorSpec:
+    """Registry entry describing a detector and the inputs it needs."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        default: Callable[[], Any],
+        requires_columns: Iterable[str] = (),
+        min_numeric_columns: int = 1,
+        uses_profiles: bool = False,
+        timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.func = func
+        self.default = default
+        self.requires_columns = tuple(requires_columns)
+        self.min_numeric_columns = min_numeric_columns
+        self.uses_profiles = uses_profiles
+        self.timeout = timeout
+
+    def is_applicable(self, data: pd.DataFrame) -> bool:
+        """Check that the data provides the columns this detector needs."""
+        if any(col not in data.columns for col in self.requires_columns):
+            return False
+        numeric_cols = data.select_dtypes(include=['float64', 'int64']).columns
+        return len(numeric_cols) >= self.min_numeric_columns
+
+
+DETECTORS: Dict[str, DetectorSpec] = {}
+
+
+def register_detector(
+    name: str,
+    default: Callable[[], Any] = dict,
+    requires_columns: Iterable[str] = (),
+    min_numeric_columns: int = 1,
+    uses_profiles: bool = False,
+    timeout: Optional[float] = None
+):
+    """
+    Register a detector under the report key ``name``.
+
+    The decorated function is called as ``func(detector, data)``, or
+    ``func(detector, data, profiles)`` when ``uses_profiles`` is set, and
+    returns the value stored in the anomaly report. It must be defined at
+    module level so that it can run in a process pool.
+    """
+    def decorator(func: Callable) -> Callable:
+        DETECTORS[name] = DetectorSpec(
+            name, func, default, requires_columns, min_numeric_columns, uses_profiles, timeout
+        )
+        return func
+    return decorator
+
+
+@register_detector('statistical_anomalies', default=dict, uses_profiles=True)
+def _statistical_detector(detector: AnomalyDetector, data: pd.DataFrame, profiles: Dict) -> Dict[str, List[int]]:
+    return detector.detect_statistical_anomalies(data, profiles)
+
+
+@register_detector('robust_anomalies', default=dict, uses_profiles=True)
+def _robust_detector(detector: AnomalyDetector, data: pd.DataFrame, profiles: Dict) -> Dict[str, List[int]]:
+    return detector.detect_robust_anomalies(data, profiles)
+
+
+@register_detector('isolation_forest_anomalies', default=list)
+def _isolation_forest_detector(detector: AnomalyDetector, data: pd.DataFrame) -> List[int]:
+    return detector.detect_isolation_forest_anomalies(data)
+
+
+@register_detector('temporal_anomalies', default=dict, requires_columns=['timestamp'])
+def _temporal_detector(detector: AnomalyDetector, data: pd.DataFrame) -> Dict[str, List[int]]:
+    return detector.detect_temporal_anomalies(data)
+
+
+@register_detector('correlation_anomalies', default=list, min_numeric_columns=2)
+def _correlation_detector(detector: AnomalyDetector, data: pd.DataFrame) -> List[Dict[str, Union[int, str]]]:
+    return detector.detect_correlation_anomalies(data)
+
+
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+# How often pending detectors are checked while some have not started yet
+TIMEOUT_POLL_INTERVAL = 0.05
+
+
+def _run_detector(
+    name: str,
+    data: pd.DataFrame,
+    profiles: Optional[Dict],
+    contamination: float,
+    options: Optional[Dict[str, Any]] = None,
+    start_times: Optional[Dict[str, float]] = None
+):
+    """Run one registered detector with its own AnomalyDetector (picklable for process pools)."""
+    if start_times is not None:
+        # Wall clock, so that the time can be compared across processes
+        start_times[name] = time.time()
+    spec = DETECTORS[name]
+    detector = AnomalyDetector(contamination=contamination, **(options or {}))
+    if spec.uses_profiles:
+        return spec.func(detector, data, profiles)
+    return spec.func(detector, data)
+
+
+def detect_anomalies(
+    data: pd.DataFrame,
+    profiles: Optional[Dict[str, ColumnProfile]] = None,
+    detectors: Optional[Iterable[str]] = None,
+    contamination: float = 0.1,
+    executor: str = 'thread',
+    max_workers: Optional[int] = None,
+    timeout: float = 120.0,
+    detector_options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Union[List, Dict]]:
+    """
+    Main function to detect all types of anomalies in the dataset.
+
+    Registered detectors run concurrently; each one is isolated, so a
+    failure or timeout leaves its default (empty) result in the report and
+    is recorded under 'detector_errors'. A detector's timeout counts from
+    the moment it starts running, not from when it was queued.
+
+    Args:
+        data (pd.DataFrame): The data to scan
+        profiles (dict): Precomputed column profiles shared by sketch-based detectors
+        detectors (list): Names of registered detectors to run (default: all)
+        contamination (float): Expected share of anomalies for Isolation Forest
+        executor (str): 'thread' or 'process' pool
+        max_workers (int): Pool size (default: one worker per detector)
+        timeout (float): Seconds each detector may take, unless its spec sets one
+        detector_options (dict): Other AnomalyDetector settings, e.g. temporal_windows,
+            temporal_threshold, temporal_min_periods or temporal_robust
+
+    Returns:
+        dict: Detector name -> findings, plus 'detector_errors'
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor!r} (expected one of {', '.join(EXECUTORS)})")
+    try:
+        AnomalyDetector(contamination=contamination, **(detector_options or {}))
+    except TypeError as e:
+        raise ValueError(f"Invalid detector options: {e}")
+    names = list(DETECTORS) if detectors is None else list(detectors)
+    unknown = [name for name in names if name not in DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown detectors: {', '.join(unknown)}")
+
+    anomaly_report = {name: DETECTORS[name].default() for name in names}
+    anomaly_report['detector_errors'] = {}
+
+    if not isinstance(data, pd.DataFrame):
+        return anomaly_report
+
+    runnable = [name for name in names if DETECTORS[name].is_applicable(data)]
+    if not runnable:
+        return anomaly_report
+    if profiles is None and any(DETECTORS[name].uses_profiles for name in runnable):
+        profiles = build_profiles(data)
+
+    manager = multiprocessing.Manager() if executor == 'process' else None
+    start_times = manager.dict() if manager else {}
+    pool = EXECUTORS[executor](max_workers=max_workers or len(runnable))
+    try:
+        futures = {
+            pool.submit(_run_detector, name, data, profiles, contamination, detector_options, start_times): name
+            for name in runnable
+        }
+        pending = set(futures)
+        while pending:
+            # Sleep until the next deadline of a running detector, or poll for newly started ones
+            now = time.time()
+            deadlines = [
+                start_times[futures[future]] + (DETECTORS[futures[future]].timeout or timeout)
+                for future in pending if futures[future] in start_times
+            ]
+            wait_for = min(deadlines, default=now + timeout) - now
+            if len(deadlines) < len(pending):
+                wait_for = min(wait_for, TIMEOUT_POLL_INTERVAL)
+            done, pending = wait(pending, timeout=max(0.0, wait_for), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = futures[future]
+                try:
+                    anomaly_report[name] = future.result()
+                except Exception as e:
+                    print(f"Error in {name} detection: {e}")
+                    anomaly_report['detector_errors'][name] = str(e)
+
+            now = time.time()
+            for future in list(pending):
+                name = futures[future]
+                limit = DETECTORS[name].timeout or timeout
+                if name in start_times and now >= start_times[name] + limit:
+                    future.cancel()
+                    pending.discard(future)
+                    anomaly_report['detector_errors'][name] = f"timed out after {limit:g}s"
+    finally:
+        # Do not block on detectors that timed out
+        pool.shutdown(wait=False, cancel_futures=True)
+        if manager:
+            manager.shutdown()
+
     return anomaly_report
@@ -2,6 +2,9 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Union, Optional
 from sklearn.impute import SimpleImputer
+from utils.temporal_gaps import (
+    analyze_gaps, empty_gap_index, expand_gap_index, to_int64_timestamps
+)
 
 class DataPreprocessor:
     def __init__(self):
@@ -59,38 +62,102 @@ class DataPreprocessor:
         
         return anomalies
 
-    def check_temporal_consistency(self, data: pd.DataFrame) -> List[int]:
+    def get_series_column(self, data: pd.DataFrame) -> Optional[str]:
+        """Return the column that separates independent series (e.g. stations), if any."""
+        for col in ['location', 'Location']:
+            if col in data.columns:
+                return col
+        return None
+
+    def analyze_temporal_gaps(self, data: pd.DataFrame) -> Dict:
+        """Infer sampling frequency per series and build the run-length encoded gap index."""
+        if 'timestamp' not in data.columns:
+            return analyze_gaps(np.array([], dtype='int64'))
+
+        series_col = self.get_series_column(data)
+        return analyze_gaps(
+            to_int64_timestamps(data['timestamp']),
+            series=data[series_col].to_numpy() if series_col else None
+        )
+
+    def check_temporal_consistency(self, data: pd.DataFrame, gap_report: Optional[Dict] = None) -> List[int]:
         """Check for temporal consistency in time series data."""
         if 'timestamp' not in data.columns:
             return []
-        
-        data = data.sort_values('timestamp')
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
-        data['time_diff'] = data['timestamp'].diff()
-        
-        # Flag records with unexpected time gaps (e.g., more than 24 hours)
-        inconsistent_indices = data[data['time_diff'] > pd.Timedelta(hours=24)].index.tolist()
-        
-        return inconsistent_indices
+
+        if gap_report is None:
+            gap_report = self.analyze_temporal_gaps(data)
+
+        # Flag the first record after each gap in the inferred sampling frequency
+        return data.index[gap_report['gap_positions']].tolist()
+
+    def fill_gaps(self, data: pd.DataFrame, gap_index: pd.DataFrame, frequency: Dict) -> pd.DataFrame:
+        """
+        Insert empty records for every timestamp missing from the gap index, ready for imputation.
+
+        Existing records keep their index labels (so earlier reports still
+        apply) and new records get labels after the largest integer label.
+        """
+        missing = expand_gap_index(gap_index, frequency)
+        if missing.empty:
+            return data
+
+        series_col = self.get_series_column(data)
+        timestamps = pd.to_datetime(data['timestamp'])
+        filler = pd.DataFrame({'timestamp': missing['timestamp'].astype(timestamps.dtype).to_numpy()})
+        if series_col:
+            filler[series_col] = pd.Series(missing['series'].to_numpy()).astype(data[series_col].dtype)
+
+        keep_labels = pd.api.types.is_integer_dtype(data.index)
+        if keep_labels:
+            first_label = data.index.max() + 1 if len(data) else 0
+            filler.index = pd.RangeIndex(first_label, first_label + len(filler))
+
+        filled = pd.concat([data.assign(timestamp=timestamps), filler],
+                           ignore_index=not keep_labels)
+        sort_cols = [series_col, 'timestamp'] if series_col else ['timestamp']
+        return filled.sort_values(sort_cols, kind='stable')
 
     def detect_duplicates(self, data: pd.DataFrame) -> List[int]:
         """Identify duplicate records."""
         return data[data.duplicated()].index.tolist()
 
-    def process_data(self, data: pd.DataFrame) -> tuple[pd.DataFrame, Dict]:
-        """Main method to run all preprocessing and validation checks."""
+    def process_data(self, data: pd.DataFrame, fill_gaps: bool = False) -> tuple[pd.DataFrame, Dict]:
+        """Main method to run all preprocessing and validation checks.
+
+        With ``fill_gaps``, records are inserted for every timestamp in the gap
+        index before imputation, and their labels are reported as 'filled_gap_rows'.
+        """
         validation_report = {
             'structure_issues': self.validate_data_structure(data),
             'range_anomalies': {},
             'temporal_inconsistencies': [],
+            'gap_index': empty_gap_index(),
+            'sampling_frequency': {},
+            'duplicate_timestamps': [],
+            'irregular_timestamps': [],
+            'filled_gap_rows': [],
             'duplicates': []
         }
         
         if not validation_report['structure_issues']:
             # Only proceed with other checks if structure is valid
+            # Gap findings refer to the records as uploaded
+            gap_report = self.analyze_temporal_gaps(data)
+            validation_report['temporal_inconsistencies'] = self.check_temporal_consistency(data, gap_report)
+            validation_report['gap_index'] = gap_report['gap_index']
+            validation_report['sampling_frequency'] = {
+                label: pd.Timedelta(step) for label, step in gap_report['frequency'].items()
+            }
+            validation_report['duplicate_timestamps'] = data.index[gap_report['duplicate_positions']].tolist()
+            validation_report['irregular_timestamps'] = data.index[gap_report['irregular_positions']].tolist()
+
+            if fill_gaps:
+                original_index = data.index
+                data = self.fill_gaps(data, gap_report['gap_index'], gap_report['frequency'])
+                validation_report['filled_gap_rows'] = data.index.difference(original_index).tolist()
             data = self.handle_missing_values(data)
             validation_report['range_anomalies'] = self.validate_ranges(data)
-            validation_report['temporal_inconsistencies'] = self.check_temporal_consistency(data)
             validation_report['duplicates'] = self.detect_duplicates(data)
         
         return data, validation_report
\ No newline at end of file
@@ -1,44 +1,85 @@
 import os
+import itertools
+import importlib.util
 import pandas as pd
 from docx import Document
 
+# python-calamine is a Rust-backed reader that pandas can use as an Excel engine
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
 def save_file(file, upload_folder):
     filepath = os.path.join(upload_folder, file.name)
     with open(filepath, "wb") as f:
         f.write(file.getbuffer())
     return filepath
 
-def extract_data(filepath):
-    if filepath.endswith('.csv'):
+def prepare_frame(df):
+    """Parse date-like columns and report missing values on a freshly read frame."""
+    # Handle date columns automatically
+    for col in df.columns:
+        # Try to convert to datetime if column name suggests it's a date
+        if any(date_hint in str(col).lower() for date_hint in ['date', 'time', 'year', 'month']):
+            try:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+            except Exception as e:
+                print(f"Warning: Could not convert {col} to datetime: {e}")
+
+    # Check for common data quality issues
+    null_counts = df.isnull().sum()
+    if null_counts.any():
+        print("Warning: Missing values detected in columns:", 
+              ", ".join(f"{col} ({count} nulls)" for col, count in null_counts[null_counts > 0].items()))
+
+    return df
+
+def iter_excel_sheets(filepath, usecols=None):
+    """
+    Lazily read an Excel workbook one sheet at a time.
+
+    Args:
+        filepath (str): Path to the .xlsx/.xls workbook
+        usecols: Column projection passed to the reader (names, letters or a callable)
+
+    Yields:
+        tuple: (sheet name, DataFrame) for every non-empty sheet
+    """
+    try:
+        workbook = pd.ExcelFile(filepath, engine=EXCEL_ENGINE)
+    except (ImportError, ValueError):
+        # Older pandas without the calamine engine falls back to openpyxl/xlrd
+        workbook = pd.ExcelFile(filepath)
+
+    with workbook:
+        for sheet_name in workbook.sheet_names:
+            df = workbook.parse(sheet_name, usecols=usecols)
+            if not df.empty:
+                yield sheet_name, df
+
+def label_sheet(name, df):
+    """Add the 'sheet' column to a workbook sheet, unless the data already has one."""
+    if 'sheet' in df.columns:
+        print(f"Warning: Sheet '{name}' already has a 'sheet' column; not labelling its rows")
+        return df
+    df['sheet'] = name
+    return df
+
+def extract_data(filepath, usecols=None):
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension == '.csv':
         try:
             # First try with default UTF-8 encoding
             try:
-                df = pd.read_csv(filepath, encoding='utf-8')
+                df = pd.read_csv(filepath, encoding='utf-8', usecols=usecols)
             except UnicodeDecodeError:
                 # If UTF-8 fails, try with different encodings
-                df = pd.read_csv(filepath, encoding='latin1')
+                df = pd.read_csv(filepath, encoding='latin1', usecols=usecols)
 
             # Basic CSV validation
             if df.empty:
                 print("Warning: CSV file is empty")
                 return None
 
-            # Handle date columns automatically
-            for col in df.columns:
-                # Try to convert to datetime if column name suggests it's a date
-                if any(date_hint in col.lower() for date_hint in ['date', 'time', 'year', 'month']):
-                    try:
-                        df[col] = pd.to_datetime(df[col], errors='coerce')
-                    except Exception as e:
-                        print(f"Warning: Could not convert {col} to datetime: {e}")
-
-            # Check for common data quality issues
-            null_counts = df.isnull().sum()
-            if null_counts.any():
-                print("Warning: Missing values detected in columns:", 
-                      ", ".join(f"{col} ({count} nulls)" for col, count in null_counts[null_counts > 0].items()))
-
-            return df
+            return prepare_frame(df)
 
         except pd.errors.EmptyDataError:
             print("Error: The CSV file is empty")
@@ -47,7 +88,7 @@ def extract_data(filepath):
             # Try with different delimiters if standard comma fails
             for delimiter in [';', '\t', '|']:
                 try:
-                    df = pd.read_csv(filepath, sep=delimiter)
+                    df = pd.read_csv(filepath, sep=delimiter, usecols=usecols)
                     print(f"Successfully read CSV with delimiter: {delimiter}")
                     return df
                 except:
@@ -57,7 +98,30 @@ def extract_data(filepath):
         except Exception as e:
             print(f"Error reading CSV: {e}")
             return None
-    elif filepath.endswith('.docx'):
+    elif extension in ('.xlsx', '.xls'):
+        try:
+            sheets = iter_excel_sheets(filepath, usecols=usecols)
+            first = next(sheets, None)
+            if first is None:
+                print("Warning: Excel file is empty")
+                return None
+
+            second = next(sheets, None)
+            if second is None:
+                df = first[1]
+            else:
+                # Keep track of where each record came from in multi-sheet workbooks,
+                # reading the remaining sheets one at a time
+                df = pd.concat(
+                    (label_sheet(name, sheet) for name, sheet in itertools.chain([first, second], sheets)),
+                    ignore_index=True
+                )
+            return prepare_frame(df)
+
+        except Exception as e:
+            print(f"Error reading Excel: {e}")
+            return None
+    elif extension == '.docx':
         try:
             doc = Document(filepath)
             return [para.text for para in doc.paragraphs if para.text.strip()]
@@ -0,0 +1,403 @@
+import os
+import re
+import copy
+import pickle
+import hashlib
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+import pandas as pd
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from utils.anomaly_detection import AnomalyDetector
+from utils.data_preprocessing import DataPreprocessor
+from utils.sketches import ColumnProfile, build_profiles, merge_profiles
+from utils.temporal_gaps import analyze_gaps, empty_gap_index, to_int64_timestamps
+
+
+def merge_reports(base: Dict, new: Dict) -> Dict:
+    """Append the findings of a newly validated tail to a stored report."""
+    merged = dict(base)
+    for key, value in new.items():
+        current = merged.get(key)
+        if isinstance(value, pd.DataFrame):
+            merged[key] = value if current is None or current.empty else pd.concat([current, value], ignore_index=True)
+        elif isinstance(value, list) and isinstance(current, list):
+            merged[key] = current + value
+        elif isinstance(value, dict) and isinstance(current, dict):
+            combined = dict(current)
+            for sub_key, sub_value in value.items():
+                if isinstance(sub_value, list) and isinstance(combined.get(sub_key), list):
+                    combined[sub_key] = combined[sub_key] + sub_value
+                else:
+                    combined[sub_key] = sub_value
+            merged[key] = combined
+        else:
+            merged[key] = value
+    return merged
+
+
+class IncrementalValidator:
+    """
+    Revalidate append-only datasets by checking only the rows added since the last run.
+
+    The dataset is split into fixed-size row chunks. Hashes of the chunks that
+    were fully validated before are stored together with the carried state
+    (row hashes for duplicates, timestamps and sampling frequency per
+    series, column sketches and the most recent rows for rolling windows).
+    When a new upload starts with the same chunks, only the tail is checked
+    and its findings are merged into the stored report. If the prefix
+    changed, or the detector settings differ from the stored run, the whole
+    dataset is validated from scratch.
+
+    Covers the range, gap/duplicate and structure checks of
+    DataPreprocessor.process_data plus the statistical, robust and temporal
+    detectors. Checks run on the raw rows rather than on imputed data.
+    Isolation Forest and correlation checks need the whole dataset and are
+    not part of the incremental report.
+
+    Statistical (z-score) and robust (IQR) findings depend on statistics of
+    the whole dataset. The values of flagged rows are stored and re-scored
+    against the merged statistics on every run, so earlier flags that no
+    longer hold are dropped. Earlier rows that would only cross a fence
+    after the statistics shift are not added, since their values are not kept.
+
+    Rows that arrive late (at or before the last stored timestamp of their
+    series) are checked for repeated timestamps but not for gaps, irregular
+    spacing or temporal spikes, since the rows around them in time are no
+    longer available; a late row that fills an earlier gap does not shrink it.
+    """
+
+    # Fences matching the defaults of detect_statistical_anomalies / detect_robust_anomalies
+    PROFILE_DETECTORS = ('statistical_anomalies', 'robust_anomalies')
+
+    def __init__(
+        self,
+        state_dir: str = "validation_state",
+        chunk_size: int = 50_000,
+        context_rows: int = 16,
+        preprocessor: Optional[DataPreprocessor] = None,
+        detector: Optional[AnomalyDetector] = None
+    ):
+        self.state_dir = state_dir
+        self.chunk_size = chunk_size
+        self.context_rows = context_rows
+        self.preprocessor = preprocessor or DataPreprocessor()
+        self.detector = detector or AnomalyDetector()
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _state_path(self, dataset_key: str) -> str:
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', dataset_key)
+        return os.path.join(self.state_dir, f"{safe_key}.pkl")
+
+    def load_state(self, dataset_key: str) -> Optional[Dict]:
+        """Load the stored state of a dataset, if any."""
+        path = self._state_path(dataset_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load validation state for {dataset_key}: {e}")
+            return None
+
+    def save_state(self, dataset_key: str, state: Dict):
+        """Atomically store the state of a dataset."""
+        path = self._state_path(dataset_key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def clear_state(self, dataset_key: str):
+        """Forget a dataset so the next run validates it from scratch."""
+        with self._locked(dataset_key):
+            path = self._state_path(dataset_key)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _new_state(self, columns: List[str]) -> Dict:
+        return {
+            'columns': columns,
+            'chunk_size': self.chunk_size,
+            'chunk_hashes': [],
+            'rows': 0,
+            'row_hashes': np.array([], dtype='uint64'),
+            'timestamps': {},
+            'frequency': {},
+            'profiles': {},
+            'context': None,
+            'validation_report': {},
+            'anomaly_report': {},
+            'flagged_values': {key: {} for key in self.PROFILE_DETECTORS},
+            'detector_settings': self._detector_settings(),
+        }
+
+    def _detector_settings(self) -> Dict:
+        """Settings that change the stored findings and the rolling context."""
+        return {
+            'temporal_windows': self.detector.temporal_windows,
+            'temporal_threshold': self.detector.temporal_threshold,
+            'temporal_min_periods': self.detector.temporal_min_periods,
+            'temporal_robust': self.detector.temporal_robust,
+        }
+
+    @staticmethod
+    def _fences(detector_name: str, profile: ColumnProfile) -> Tuple[float, float]:
+        if detector_name == 'statistical_anomalies':
+            return profile.mean - 3 * profile.std, profile.mean + 3 * profile.std
+        q1, q3 = profile.quantile(np.array([0.25, 0.75]))
+        return q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+
+    def _rescore(self, flagged_values: Dict, profiles: Dict) -> Dict:
+        """Keep the stored flags that are still outside the fences of the merged profiles."""
+        findings = {}
+        for detector_name, columns in flagged_values.items():
+            findings[detector_name] = {}
+            for col, values in columns.items():
+                if col not in profiles:
+                    continue
+                low, high = self._fences(detector_name, profiles[col])
+                findings[detector_name][col] = values.index[(values < low) | (values > high)].tolist()
+        return findings
+
+    def _chunk_hashes(self, row_hashes: np.ndarray, n_chunks: int) -> List[str]:
+        return [
+            hashlib.blake2b(
+                row_hashes[i * self.chunk_size:(i + 1) * self.chunk_size].tobytes(), digest_size=16
+            ).hexdigest()
+            for i in range(n_chunks)
+        ]
+
+    def _check_gaps(self, state: Dict, part: pd.DataFrame) -> Tuple[Dict, Dict]:
+        """Run the gap engine on the part, seeded with the last timestamp of each series."""
+        report = {
+            'temporal_inconsistencies': [],
+            'gap_index': empty_gap_index(),
+            'duplicate_timestamps': [],
+            'irregular_timestamps': [],
+        }
+        updates = {'timestamps': state['timestamps'], 'frequency': state['frequency']}
+        if 'timestamp' not in part.columns:
+            return report, updates
+
+        series_col = self.preprocessor.get_series_column(part)
+        history = state['timestamps']
+        part_ts = to_int64_timestamps(part['timestamp'])
+        row_labels = part[series_col].to_numpy(dtype=object) if series_col else np.full(len(part), None, dtype=object)
+        # Codes shared by stored and new labels (None/NaN labels included)
+        codes, labels = pd.factorize(
+            pd.Series(np.concatenate((np.array(list(history), dtype=object), row_labels)), dtype=object),
+            use_na_sentinel=False
+        )
+        stored_codes, row_codes = codes[:len(history)], codes[len(history):]
+
+        # Late rows (not after the stored last timestamp of their series) would open
+        # false gaps against the carried timestamp, so the gap engine skips them; the
+        # stored timestamps still tell whether they repeat one seen before
+        valid = part_ts != np.iinfo('int64').min
+        late = np.zeros(len(part), dtype=bool)
+        repeated = np.zeros(len(part), dtype=bool)
+        for code, seen in zip(stored_codes, history.values()):
+            rows = np.flatnonzero((row_codes == code) & valid & (part_ts <= seen[-1]))
+            late[rows] = True
+            found = np.searchsorted(seen, part_ts[rows]).clip(max=len(seen) - 1)
+            repeated[rows] = seen[found] == part_ts[rows]
+        late_rows = pd.DataFrame({'series': row_codes, 'timestamp': part_ts})[late & ~repeated]
+        repeated[late_rows.index[late_rows.duplicated()]] = True
+
+        carried = [(label, seen[-1]) for label, seen in history.items()]
+        timestamps = np.concatenate((
+            np.array([ts for _, ts in carried], dtype='int64'),
+            np.where(late, np.iinfo('int64').min, part_ts)
+        ))
+        series = None
+        if series_col:
+            series = np.concatenate((np.array([label for label, _ in carried], dtype=object), row_labels))
+        gaps = analyze_gaps(timestamps, series=series, frequency=state['frequency'] or None)
+
+        n_carried = len(carried)
+        for key, positions in [('temporal_inconsistencies', gaps['gap_positions']),
+                               ('duplicate_timestamps', gaps['duplicate_positions']),
+                               ('irregular_timestamps', gaps['irregular_positions'])]:
+            positions = positions[positions >= n_carried] - n_carried
+            if key == 'duplicate_timestamps':
+                positions = np.union1d(positions, np.flatnonzero(repeated))
+            report[key] = part.index[positions].tolist()
+        report['gap_index'] = gaps['gap_index']
+
+        # Keep every timestamp per series (sorted, unique) for the next run
+        updates['timestamps'] = dict(history)
+        for code in np.unique(row_codes[valid]):
+            label = labels[code]
+            new = part_ts[valid & (row_codes == code)]
+            seen = history.get(label)
+            updates['timestamps'][label] = np.unique(new) if seen is None else np.union1d(seen, new)
+        updates['frequency'] = {**gaps['frequency'], **state['frequency']}
+        return report, updates
+
+    def _rolling_context(self, window_data: pd.DataFrame) -> pd.DataFrame:
+        """Most recent rows needed to seed the detector's rolling windows on the next run."""
+        windows = self.detector.temporal_windows
+        rows = max([self.context_rows] + [int(w) for w in windows if isinstance(w, (int, np.integer))])
+        context = window_data.tail(rows)
+
+        spans = [pd.Timedelta(w) for w in windows if not isinstance(w, (int, np.integer))]
+        if spans and 'timestamp' in window_data.columns:
+            timestamps = pd.to_datetime(window_data['timestamp'])
+            recent = window_data[timestamps >= timestamps.max() - max(spans)]
+            if len(recent) > len(context):
+                context = recent
+        return context
+
+    def _validate_part(self, state: Dict, part: pd.DataFrame, row_hashes: np.ndarray) -> Tuple[Dict, Dict, Dict]:
+        """Validate new rows against the carried state without modifying it."""
+        validation_report, gap_updates = self._check_gaps(state, part)
+        validation_report['range_anomalies'] = self.preprocessor.validate_ranges(part)
+
+        # Duplicates within the part and against every previously seen row
+        seen = state['row_hashes']
+        positions = np.searchsorted(seen, row_hashes).clip(max=max(len(seen) - 1, 0))
+        seen_before = seen[positions] == row_hashes if len(seen) else np.zeros(len(row_hashes), dtype=bool)
+        is_duplicate = seen_before | pd.Series(row_hashes).duplicated().to_numpy()
+        validation_report['duplicates'] = part.index[is_duplicate].tolist()
+        validation_report['sampling_frequency'] = {
+            label: pd.Timedelta(step) for label, step in gap_updates['frequency'].items()
+        }
+
+        numeric_cols = part.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        profiles = merge_profiles(state['profiles'], build_profiles(part, columns=numeric_cols))
+
+        # Rolling windows see the most recent rows of the previous run
+        context = state['context']
+        window_data = part if context is None else pd.concat([context, part])
+        temporal = self.detector.detect_temporal_anomalies(window_data)
+        new_labels = set(part.index)
+        anomaly_report = {
+            'statistical_anomalies': self.detector.detect_statistical_anomalies(part, profiles),
+            'robust_anomalies': self.detector.detect_robust_anomalies(part, profiles),
+            'temporal_anomalies': {
+                col: [label for label in labels if label in new_labels]
+                for col, labels in temporal.items()
+            },
+        }
+
+        if 'timestamp' in window_data.columns:
+            window_data = window_data.sort_values('timestamp', kind='stable')
+        unique_hashes = np.unique(row_hashes[~seen_before])
+        updates = {
+            **gap_updates,
+            'profiles': profiles,
+            'context': self._rolling_context(window_data),
+            'row_hashes': np.insert(seen, np.searchsorted(seen, unique_hashes), unique_hashes),
+        }
+        return validation_report, anomaly_report, updates
+
+    @contextmanager
+    def _locked(self, dataset_key: str):
+        """Hold an exclusive lock on a dataset's state, across threads and processes."""
+        with open(f"{self._state_path(dataset_key)}.lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def validate(self, dataset_key: str, data: pd.DataFrame) -> Tuple[Dict, Dict]:
+        """
+        Validate a dataset, reusing the results for a previously validated prefix.
+
+        Runs for the same ``dataset_key`` are serialized with a lock file next
+        to the stored state, so concurrent uploads cannot overwrite each other.
+
+        Args:
+            dataset_key (str): Stable name of the feed (e.g. the upload file name)
+            data (pd.DataFrame): The full current dataset (previous rows + appended rows)
+
+        Returns:
+            tuple: (validation report, anomaly report) covering all rows; the
+            validation report's 'incremental' entry says how many rows were reused
+        """
+        with self._locked(dataset_key):
+            return self._validate(dataset_key, data)
+
+    def _validate(self, dataset_key: str, data: pd.DataFrame) -> Tuple[Dict, Dict]:
+        structure_issues = self.preprocessor.validate_data_structure(data)
+        if structure_issues:
+            return {'structure_issues': structure_issues}, {}
+
+        columns = data.columns.tolist()
+        row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy(dtype='uint64')
+        n_full = len(data) // self.chunk_size
+        chunk_hashes = self._chunk_hashes(row_hashes, n_full)
+
+        state = self.load_state(dataset_key)
+        if (state is None
+                or state.keys() != self._new_state(columns).keys()
+                or state['columns'] != columns
+                or state['chunk_size'] != self.chunk_size
+                or state['detector_settings'] != self._detector_settings()
+                or chunk_hashes[:len(state['chunk_hashes'])] != state['chunk_hashes']):
+            # The stored prefix no longer matches: start over
+            state = self._new_state(columns)
+        reused_rows = state['rows']
+
+        # Rows up to the last full chunk are committed into the stored state
+        commit_end = n_full * self.chunk_size
+        if commit_end > state['rows']:
+            start = state['rows']
+            validation, anomalies, updates = self._validate_part(
+                state, data.iloc[start:commit_end], row_hashes[start:commit_end]
+            )
+            state.update(updates)
+            part = data.iloc[start:commit_end]
+            for detector_name in self.PROFILE_DETECTORS:
+                stored = state['flagged_values'][detector_name]
+                for col, labels in anomalies[detector_name].items():
+                    values = part.loc[labels, col]
+                    stored[col] = values if col not in stored else pd.concat([stored[col], values])
+            state['validation_report'] = merge_reports(state['validation_report'], validation)
+            state['anomaly_report'] = merge_reports(state['anomaly_report'], anomalies)
+            state['chunk_hashes'] = chunk_hashes
+            state['rows'] = commit_end
+            self.save_state(dataset_key, state)
+
+        validation_report = copy.deepcopy(state['validation_report'])
+        anomaly_report = copy.deepcopy(state['anomaly_report'])
+        profiles = state['profiles']
+        tail_findings = {detector_name: {} for detector_name in self.PROFILE_DETECTORS}
+
+        # The trailing partial chunk is revalidated on every run
+        if len(data) > commit_end:
+            validation, anomalies, updates = self._validate_part(
+                state, data.iloc[commit_end:], row_hashes[commit_end:]
+            )
+            profiles = updates['profiles']
+            for detector_name in self.PROFILE_DETECTORS:
+                tail_findings[detector_name] = anomalies.pop(detector_name)
+            validation_report = merge_reports(validation_report, validation)
+            anomaly_report = merge_reports(anomaly_report, anomalies)
+
+        # Stored statistical/robust flags are re-scored against statistics of all rows
+        rescored = self._rescore(state['flagged_values'], profiles)
+        for detector_name in self.PROFILE_DETECTORS:
+            anomaly_report[detector_name] = merge_reports(rescored[detector_name], tail_findings[detector_name])
+
+        validation_report['structure_issues'] = []
+        validation_report['incremental'] = {
+            'reused_rows': reused_rows,
+            'validated_rows': len(data) - reused_rows,
+        }
+        return validation_report, anomaly_report
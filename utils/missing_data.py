@@ -0,0 +1,95 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Union
+from utils.temporal_gaps import to_int64_timestamps
+
+
+def null_runs(mask: np.ndarray) -> np.ndarray:
+    """Return (start, length) pairs of consecutive True values in a boolean mask."""
+    padded = np.concatenate(([False], mask, [False])).view('int8')
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[::2], edges[1::2]
+    return np.column_stack((starts, ends - starts))
+
+
+def summarize_missing(
+    data: pd.DataFrame,
+    time_column: Optional[str] = 'timestamp',
+    buckets: int = 200
+) -> Dict[str, Union[np.ndarray, pd.DataFrame, pd.Series]]:
+    """
+    Aggregate missing values per column into time buckets and null runs.
+
+    Rows are ordered by ``time_column`` (or kept in file order if it is
+    missing) and split into at most ``buckets`` equal time ranges, so the
+    summary size depends on the number of buckets and columns, not rows.
+    Rows with an unparseable timestamp are only counted in 'null_counts'.
+
+    Args:
+        data (pd.DataFrame): The data to summarize
+        time_column (str): Column used to order and bucket rows
+        buckets (int): Number of time buckets
+
+    Returns:
+        dict: 'null_counts' (per column), 'null_fraction' (bucket x column
+        fractions indexed by bucket start), 'row_counts' (rows per bucket),
+        'null_runs' (column, start, end, length of each run of consecutive
+        nulls, in time order) and 'longest_run' (per column)
+    """
+    n = len(data)
+    null_counts = pd.Series({col: int(data[col].isna().sum()) for col in data.columns}, dtype='int64')
+
+    if time_column in data.columns:
+        timestamps = to_int64_timestamps(data[time_column])
+        positions = np.flatnonzero(timestamps != np.iinfo('int64').min)
+        order = positions[np.argsort(timestamps[positions], kind='stable')]
+        sorted_ts = timestamps[order]
+    else:
+        order = np.arange(n)
+        sorted_ts = None
+
+    m = len(order)
+    buckets = max(1, min(buckets, m))
+    if sorted_ts is not None and m and sorted_ts[-1] > sorted_ts[0]:
+        # Integer bucket starts (k * span // buckets without overflowing int64)
+        step, remainder = divmod(int(sorted_ts[-1] - sorted_ts[0]), buckets)
+        k = np.arange(buckets, dtype='int64')
+        starts = sorted_ts[0] + k * step + k * remainder // buckets
+        bucket_ids = np.searchsorted(starts, sorted_ts, side='right') - 1
+        bucket_index = pd.to_datetime(starts)
+    else:
+        bucket_ids = np.arange(m) * buckets // max(m, 1)
+        bucket_index = pd.Index(np.arange(buckets) * max(m, 1) // buckets, name='row')
+
+    row_counts = np.bincount(bucket_ids, minlength=buckets)
+    labels = data.index[order]
+    fractions = {}
+    runs = []
+    for col in data.columns:
+        mask = data[col].isna().to_numpy()[order]
+        nulls = np.bincount(bucket_ids, weights=mask, minlength=buckets)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fractions[col] = nulls / row_counts
+
+        col_runs = null_runs(mask)
+        if len(col_runs):
+            runs.append(pd.DataFrame({
+                'column': col,
+                'start': labels[col_runs[:, 0]],
+                'end': labels[col_runs[:, 0] + col_runs[:, 1] - 1],
+                'length': col_runs[:, 1],
+            }))
+
+    if runs:
+        run_table = pd.concat(runs, ignore_index=True)
+    else:
+        run_table = pd.DataFrame({'column': [], 'start': [], 'end': [], 'length': []})
+    longest = run_table.groupby('column')['length'].max() if len(run_table) else pd.Series(dtype='int64')
+
+    return {
+        'null_counts': null_counts,
+        'null_fraction': pd.DataFrame(fractions, index=bucket_index),
+        'row_counts': row_counts,
+        'null_runs': run_table,
+        'longest_run': longest.reindex(data.columns, fill_value=0).astype('int64'),
+    }
@@ -0,0 +1,111 @@
+import io
+import hashlib
+import threading
+import pandas as pd
+import matplotlib.pyplot as plt
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+def dataset_hash(data: pd.DataFrame) -> str:
+    """Fingerprint a frame's contents, index and column names."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(data.columns.tolist()).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def render_figure(fig, format: str = 'png', dpi: int = 100) -> bytes:
+    """Render a matplotlib figure to image bytes and always close it."""
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=format, dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+class ChartCache:
+    """Thread-safe LRU cache of rendered chart images, bounded by total size."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images: 'OrderedDict[Tuple, Optional[bytes]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data_hash: str, chart_type: str, column: Optional[Hashable] = None,
+                 params: Optional[Dict] = None) -> Tuple:
+        return (data_hash, chart_type, repr(column), repr(sorted((params or {}).items())))
+
+    def get(self, key: Tuple) -> Tuple[bool, Optional[bytes]]:
+        """Return (found, image); image is None for charts that had nothing to draw."""
+        with self._lock:
+            if key not in self._images:
+                self.misses += 1
+                return False, None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return True, self._images[key]
+
+    def put(self, key: Tuple, image: Optional[bytes]):
+        size = len(image) if image else 0
+        with self._lock:
+            if key in self._images:
+                old = self._images.pop(key)
+                self._size -= len(old) if old else 0
+            self._images[key] = image
+            self._size += size
+            while self._size > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self._size -= len(evicted) if evicted else 0
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._size = 0
+
+
+def render_chart(
+    cache: ChartCache,
+    data_hash: str,
+    chart_type: str,
+    plot_func: Callable,
+    *args,
+    column: Optional[Hashable] = None,
+    params: Optional[Dict] = None,
+    **kwargs
+) -> Optional[bytes]:
+    """
+    Return the rendered image for a chart, drawing it only on a cache miss.
+
+    Args:
+        cache (ChartCache): Cache of rendered images
+        data_hash (str): dataset_hash() of the data being plotted
+        chart_type (str): Name of the chart (e.g. 'distribution')
+        plot_func (callable): Function returning a matplotlib figure or None
+        column: Column (or columns) the chart shows
+        params (dict): Any other settings that change the picture
+
+    Returns:
+        bytes: PNG image, or None if the plot function had nothing to draw
+    """
+    key = ChartCache.make_key(data_hash, chart_type, column, params)
+    found, image = cache.get(key)
+    if found:
+        return image
+
+    open_figures = set(plt.get_fignums())
+    try:
+        fig = plot_func(*args, **kwargs)
+    except Exception:
+        # Do not leak figures the plot function created before failing
+        for number in set(plt.get_fignums()) - open_figures:
+            plt.close(number)
+        raise
+    image = render_figure(fig) if fig is not None else None
+    cache.put(key, image)
+    return image
@@ -0,0 +1,330 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, Optional, Union
+
+
+class TDigest:
+    """Mergeable quantile sketch (t-digest with the arcsine scale function)."""
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.means = np.array([], dtype='float64')
+        self.weights = np.array([], dtype='float64')
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values: np.ndarray) -> 'TDigest':
+        """Add a batch of values (NaN is ignored)."""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._compress(np.concatenate((self.means, values)),
+                           np.concatenate((self.weights, np.ones(values.size))))
+        return self
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Fold another digest into this one."""
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate((self.means, other.means)),
+                           np.concatenate((self.weights, other.weights)))
+        return self
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+
+        # Centroids may span at most one unit of the scale function k(q)
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        buckets = np.floor(k - k.min()).astype('int64')
+        starts = np.flatnonzero(np.concatenate(([True], np.diff(buckets) != 0)))
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Estimate quantile(s) by interpolating between centroid midpoints."""
+        if not self.weights.size:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        total = self.weights.sum()
+        positions = np.concatenate(([0.0], np.cumsum(self.weights) - self.weights / 2, [total]))
+        values = np.concatenate(([self.min], self.means, [self.max]))
+        return np.interp(np.asarray(q) * total, positions, values)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with 2**precision one-byte registers."""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype='uint8')
+
+    def update(self, values: Union[pd.Series, np.ndarray]) -> 'HyperLogLog':
+        """Add a batch of values of any dtype (nulls are ignored)."""
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return self
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype='uint64')
+
+        index = (hashes >> np.uint64(64 - self.precision)).astype('int64')
+        # Rank = position of the first set bit in the next 32 bits
+        top = ((hashes << np.uint64(self.precision)) >> np.uint64(32)).astype('float64')
+        rank = np.where(top > 0, 33 - np.frexp(top)[1], 33).astype('uint8')
+
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Fold another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        """Estimated number of distinct values."""
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype('int64')))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return float(m * np.log(m / zeros))
+        return float(raw)
+
+
+class FixedBinHistogram:
+    """
+    Mergeable histogram with a fixed number of equal-width bins.
+
+    Bin widths are powers of two aligned at zero, so the span grows by
+    doubling the width (summing neighbouring bins) when new values fall
+    outside it, and two histograms can always be aligned for merging.
+    """
+
+    def __init__(self, bins: int = 64):
+        self.bins = bins
+        self.exponent: Optional[int] = None  # bin width is 2**exponent
+        self.offset = 0  # absolute bin id of counts[0]
+        self.counts = np.zeros(bins, dtype='int64')
+
+    @property
+    def width(self) -> float:
+        return float(np.ldexp(1.0, self.exponent)) if self.exponent is not None else np.nan
+
+    @property
+    def edges(self) -> np.ndarray:
+        return (self.offset + np.arange(self.bins + 1)) * self.width
+
+    def _double(self, times: int = 1):
+        for _ in range(times):
+            ids = (self.offset + np.arange(self.bins)) // 2
+            new_offset = int(ids[0])
+            counts = np.zeros(self.bins, dtype='int64')
+            np.add.at(counts, ids - new_offset, self.counts)
+            self.counts, self.offset, self.exponent = counts, new_offset, self.exponent + 1
+
+    def _fit(self, low_id: int, high_id: int):
+        """Double the width until [low_id, high_id] and the occupied bins fit, then re-anchor."""
+        occupied = np.flatnonzero(self.counts)
+        if occupied.size:
+            low_id = min(low_id, self.offset + int(occupied[0]))
+            high_id = max(high_id, self.offset + int(occupied[-1]))
+        while high_id - low_id >= self.bins:
+            self._double()
+            low_id, high_id = low_id // 2, high_id // 2
+        if low_id < self.offset or high_id >= self.offset + self.bins:
+            counts = np.zeros(self.bins, dtype='int64')
+            if occupied.size:
+                shift = self.offset - low_id
+                nonzero = np.flatnonzero(self.counts)
+                counts[nonzero + shift] = self.counts[nonzero]
+            self.counts, self.offset = counts, low_id
+
+    def update(self, values: np.ndarray) -> 'FixedBinHistogram':
+        """Add a batch of values (NaN and infinities are ignored)."""
+        values = np.asarray(values, dtype='float64')
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return self
+        if self.exponent is None:
+            span = values.max() - values.min()
+            scale = span / self.bins if span > 0 else max(abs(values.max()), 1.0) / self.bins
+            self.exponent = int(np.ceil(np.log2(scale)))
+            self.offset = int(np.floor(values.min() / self.width))
+
+        low_id = int(np.floor(values.min() / self.width))
+        high_id = int(np.floor(values.max() / self.width))
+        self._fit(low_id, high_id)
+
+        ids = np.floor(values / self.width).astype('int64') - self.offset
+        self.counts += np.bincount(ids, minlength=self.bins)
+        return self
+
+    def merge(self, other: 'FixedBinHistogram') -> 'FixedBinHistogram':
+        """Fold another histogram with the same number of bins into this one."""
+        if other.bins != self.bins:
+            raise ValueError("Cannot merge histograms with a different number of bins")
+        if other.exponent is None:
+            return self
+        other = other.copy()
+        if self.exponent is None:
+            self.exponent, self.offset, self.counts = other.exponent, other.offset, other.counts
+            return self
+
+        if self.exponent < other.exponent:
+            self._double(other.exponent - self.exponent)
+        elif other.exponent < self.exponent:
+            other._double(self.exponent - other.exponent)
+
+        occupied = np.flatnonzero(other.counts)
+        if occupied.size:
+            self._fit(other.offset + int(occupied[0]), other.offset + int(occupied[-1]))
+            # Re-fitting may have doubled this histogram again
+            other._double(self.exponent - other.exponent)
+            nonzero = np.flatnonzero(other.counts)
+            np.add.at(self.counts, other.offset + nonzero - self.offset, other.counts[nonzero])
+        return self
+
+    def copy(self) -> 'FixedBinHistogram':
+        clone = FixedBinHistogram(self.bins)
+        clone.exponent, clone.offset, clone.counts = self.exponent, self.offset, self.counts.copy()
+        return clone
+
+
+class ColumnProfile:
+    """One-pass, mergeable summary of a column: moments, quantiles, distinct count and histogram."""
+
+    def __init__(self, compression: int = 200, precision: int = 14, bins: int = 64):
+        self.count = 0
+        self.null_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.digest = TDigest(compression)
+        self.distinct = HyperLogLog(precision)
+        self.histogram = FixedBinHistogram(bins)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, like pandas)."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+    @property
+    def min(self) -> float:
+        return self.digest.min if self.count else np.nan
+
+    @property
+    def max(self) -> float:
+        return self.digest.max if self.count else np.nan
+
+    def quantile(self, q: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        return self.digest.quantile(q)
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        # Chan et al. parallel update of mean and M2
+        total = self.count + count
+        if total == 0:
+            return
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, values: pd.Series) -> 'ColumnProfile':
+        """Add a chunk of a column (±inf is left out of the moments and quantiles)."""
+        values = pd.Series(values)
+        numeric = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
+        valid = numeric[np.isfinite(numeric)]
+        self.null_count += int(values.isna().sum())
+        if valid.size:
+            chunk_mean = float(valid.mean())
+            self._merge_moments(valid.size, chunk_mean, float(((valid - chunk_mean) ** 2).sum()))
+            self.digest.update(valid)
+            self.histogram.update(valid)
+        if pd.api.types.is_numeric_dtype(values):
+            # Hash numbers as float64 so int and float partitions of a column agree (+ 0.0 folds -0.0)
+            self.distinct.update(numeric[~np.isnan(numeric)] + 0.0)
+        else:
+            self.distinct.update(values)
+        return self
+
+    def merge(self, other: 'ColumnProfile') -> 'ColumnProfile':
+        """Fold a profile of another partition or file into this one."""
+        self.null_count += other.null_count
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.digest.merge(other.digest)
+        self.distinct.merge(other.distinct)
+        self.histogram.merge(other.histogram)
+        return self
+
+    def summary(self) -> Dict[str, float]:
+        q1, median, q3 = self.quantile(np.array([0.25, 0.5, 0.75]))
+        return {
+            'count': self.count,
+            'null_count': self.null_count,
+            'mean': self.mean if self.count else np.nan,
+            'std': self.std,
+            'min': self.min,
+            'q1': float(q1),
+            'median': float(median),
+            'q3': float(q3),
+            'max': self.max,
+            'distinct': self.distinct.estimate(),
+        }
+
+
+def iter_chunks(data: Union[pd.DataFrame, Iterable[pd.DataFrame]], chunk_size: int = 100_000) -> Iterable[pd.DataFrame]:
+    """Yield a frame in row chunks, or pass through an iterable of chunks (e.g. read_csv(chunksize=...))."""
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    else:
+        yield from data
+
+
+def build_profiles(
+    data: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    columns: Optional[Iterable[str]] = None,
+    chunk_size: int = 100_000
+) -> Dict[str, ColumnProfile]:
+    """
+    Build a ColumnProfile per column in a single pass over the chunks.
+
+    Args:
+        data: A DataFrame or an iterable of DataFrame chunks
+        columns: Columns to profile (defaults to the numeric columns of the first chunk)
+        chunk_size (int): Rows per chunk when ``data`` is a DataFrame
+
+    Returns:
+        dict: Column name -> ColumnProfile
+    """
+    profiles: Dict[str, ColumnProfile] = {}
+    for chunk in iter_chunks(data, chunk_size):
+        if columns is None:
+            columns = chunk.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        for col in columns:
+            profiles.setdefault(col, ColumnProfile()).update(chunk[col])
+    return profiles
+
+
+def merge_profiles(*profile_sets: Dict[str, ColumnProfile]) -> Dict[str, ColumnProfile]:
+    """Merge per-column profiles built on different partitions or files."""
+    merged: Dict[str, ColumnProfile] = {}
+    for profiles in profile_sets:
+        for col, profile in profiles.items():
+            if col in merged:
+                merged[col].merge(profile)
+            else:
+                merged[col] = ColumnProfile(
+                    profile.digest.compression, profile.distinct.precision, profile.histogram.bins
+                ).merge(profile)
+    return merged
@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Mapping, Optional, Union
+
+
+def to_int64_timestamps(values: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    """Convert timestamps to int64 nanoseconds since epoch (NaT becomes iNaT)."""
+    timestamps = pd.to_datetime(pd.Series(values), errors='coerce')
+    if getattr(timestamps.dt, 'tz', None) is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    return timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def infer_frequency(sorted_timestamps: np.ndarray) -> Optional[int]:
+    """Infer the expected sampling step (ns) as the most common positive difference."""
+    diffs = np.diff(sorted_timestamps)
+    diffs = diffs[diffs > 0]
+    if diffs.size == 0:
+        return None
+    steps, counts = np.unique(diffs, return_counts=True)
+    return int(steps[np.argmax(counts)])
+
+
+def empty_gap_index() -> pd.DataFrame:
+    """Return an empty gap index with the expected columns and dtypes."""
+    return pd.DataFrame({
+        'series': pd.Series([], dtype=object),
+        'start': pd.Series([], dtype='datetime64[ns]'),
+        'end': pd.Series([], dtype='datetime64[ns]'),
+        'missing_count': pd.Series([], dtype='int64'),
+    })
+
+
+def analyze_gaps(
+    timestamps: np.ndarray,
+    series: Optional[np.ndarray] = None,
+    frequency: Optional[Union[int, Mapping]] = None,
+    tolerance: float = 0.1
+) -> Dict[str, Union[Dict, np.ndarray, pd.DataFrame]]:
+    """
+    Detect gaps, duplicated timestamps and irregular sampling.
+
+    Each series is sorted by time, its expected step is inferred from the
+    int64 differences (unless given), and every difference is classified with
+    vectorized numpy operations.
+
+    Args:
+        timestamps (np.ndarray): int64 nanosecond timestamps (iNaT is ignored)
+        series (np.ndarray): Optional series label per timestamp (e.g. location)
+        frequency (int or dict): Known step in ns, globally or per series label
+        tolerance (float): Allowed deviation from a multiple of the step, as a fraction of it
+
+    Returns:
+        dict: 'frequency' (series -> step in ns), 'gap_index' (run-length encoded
+        gaps with series, start, end and missing_count), and positions into
+        ``timestamps`` for 'gap_positions' (first sample after a gap),
+        'duplicate_positions' and 'irregular_positions'
+    """
+    timestamps = np.asarray(timestamps, dtype='int64')
+    if series is None:
+        series = np.zeros(len(timestamps), dtype='int64')
+        labels = [None]
+    else:
+        # Integer codes keep the original label values (and their dtype)
+        series, uniques = pd.factorize(pd.Series(series), use_na_sentinel=False)
+        labels = pd.Index(uniques).tolist()
+
+    valid = timestamps != np.iinfo('int64').min
+    positions = np.flatnonzero(valid)
+    order = positions[np.lexsort((timestamps[positions], series[positions]))]
+    ts_sorted = timestamps[order]
+    series_sorted = series[order]
+
+    # Segment boundaries between consecutive series in the sorted order
+    bounds = np.flatnonzero(np.diff(series_sorted)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+
+    steps = np.zeros(len(order), dtype='int64')
+    frequencies = {}
+    for start, end in zip(starts, ends):
+        if end <= start:
+            continue
+        label = labels[series_sorted[start]]
+        if isinstance(frequency, Mapping):
+            step = frequency.get(label)
+        else:
+            step = frequency
+        if step is None:
+            step = infer_frequency(ts_sorted[start:end])
+        if step:
+            frequencies[label] = int(step)
+            steps[start:end] = step
+
+    result = {
+        'frequency': frequencies,
+        'gap_index': empty_gap_index(),
+        'gap_positions': np.array([], dtype='int64'),
+        'duplicate_positions': np.array([], dtype='int64'),
+        'irregular_positions': np.array([], dtype='int64'),
+    }
+    if len(order) < 2:
+        return result
+
+    # Only compare neighbours that belong to the same series
+    same_series = series_sorted[1:] == series_sorted[:-1]
+    diffs = np.diff(ts_sorted)
+    step = steps[1:]
+    has_step = same_series & (step > 0)
+    safe_step = np.where(step > 0, step, 1)
+
+    n_steps = np.rint(diffs / safe_step).astype('int64')
+    remainder = np.abs(diffs - n_steps * safe_step)
+
+    duplicates = same_series & (diffs == 0)
+    irregular = has_step & (diffs > 0) & (remainder > tolerance * safe_step)
+    gaps = has_step & (n_steps > 1)
+
+    after = order[1:]
+    result['duplicate_positions'] = np.sort(after[duplicates])
+    result['irregular_positions'] = np.sort(after[irregular])
+    result['gap_positions'] = np.sort(after[gaps])
+
+    gap_rows = np.flatnonzero(gaps)
+    if gap_rows.size:
+        series_labels = np.empty(gap_rows.size, dtype=object)
+        series_labels[:] = [labels[code] for code in series_sorted[gap_rows]]
+        result['gap_index'] = pd.DataFrame({
+            'series': series_labels,
+            'start': (ts_sorted[gap_rows] + step[gap_rows]).view('datetime64[ns]'),
+            'end': (ts_sorted[gap_rows + 1] - step[gap_rows]).view('datetime64[ns]'),
+            'missing_count': n_steps[gap_rows] - 1,
+        })
+
+    return result
+
+
+def expand_gap_index(gap_index: pd.DataFrame, frequency: Mapping) -> pd.DataFrame:
+    """
+    Expand a run-length encoded gap index into one row per missing timestamp.
+
+    The result (series, timestamp) can be appended to the data as empty rows
+    so that imputation fills the gaps.
+    """
+    if gap_index.empty:
+        return pd.DataFrame({'series': pd.Series([], dtype=object),
+                             'timestamp': pd.Series([], dtype='datetime64[ns]')})
+
+    counts = gap_index['missing_count'].to_numpy(dtype='int64')
+    steps = np.array([pd.Timedelta(frequency[label]).value for label in gap_index['series']], dtype='int64')
+    starts = gap_index['start'].to_numpy(dtype='datetime64[ns]').view('int64')
+
+    # Offset of each missing sample within its run, without a Python loop
+    run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    missing = np.repeat(starts, counts) + run_offsets * np.repeat(steps, counts)
+
+    return pd.DataFrame({
+        'series': np.repeat(gap_index['series'].to_numpy(dtype=object), counts),
+        'timestamp': missing.view('datetime64[ns]'),
+    })